@@ -0,0 +1,30 @@
+"""conversation summary
+
+Revision ID: 2b8f6d13a9e0
+Revises: c71e9b04d5a6
+Create Date: 2026-02-02 14:26:03.417759
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b8f6d13a9e0'
+down_revision: Union[str, Sequence[str], None] = 'c71e9b04d5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('conversations', sa.Column('summary_message_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('conversations', 'summary_message_id')
+    op.drop_column('conversations', 'summary')
@@ -0,0 +1,40 @@
+"""message conversation index
+
+Revision ID: 4f1c2a9d7e3b
+Revises: b3b5c21294a0
+Create Date: 2026-01-12 10:42:18.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a9d7e3b'
+down_revision: Union[str, Sequence[str], None] = 'b3b5c21294a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes on large tables (Postgres only)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_conversation_id_created_at_id',
+            'messages',
+            ['conversation_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_messages_conversation_id_created_at_id',
+            table_name='messages',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,31 @@
+"""stream checkpoint failure flag
+
+Revision ID: 6e2b9f4c8d13
+Revises: c4a8e6f0d215
+Create Date: 2026-10-18 10:42:16.204851
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2b9f4c8d13'
+down_revision: Union[str, Sequence[str], None] = 'c4a8e6f0d215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing checkpoints predate failure tracking; stale ones still end as
+    # interrupted once updated_at is old enough
+    op.add_column('stream_checkpoints', sa.Column('failed', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('stream_checkpoints') as batch_op:
+        batch_op.drop_column('failed')
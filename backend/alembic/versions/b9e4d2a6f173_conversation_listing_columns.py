@@ -0,0 +1,91 @@
+"""conversation listing columns and activity indexes
+
+Revision ID: b9e4d2a6f173
+Revises: a7d3f1e9c452
+Create Date: 2026-03-05 16:22:09.781530
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4d2a6f173'
+down_revision: Union[str, Sequence[str], None] = 'a7d3f1e9c452'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 1000
+PREVIEW_CHARS = 120
+
+# Correlated subqueries, each served by ix_messages_conversation_id_created_at_id
+BACKFILL = f'''
+UPDATE conversations SET
+    message_count = (SELECT count(*) FROM messages m WHERE m.conversation_id = conversations.id),
+    last_message_at = (SELECT max(m.created_at) FROM messages m WHERE m.conversation_id = conversations.id),
+    last_message_preview = (
+        SELECT substr(m.content, 1, {PREVIEW_CHARS}) FROM messages m
+        WHERE m.conversation_id = conversations.id
+        ORDER BY m.created_at DESC, m.id DESC LIMIT 1
+    ),
+    last_activity_at = coalesce(
+        (SELECT max(m.created_at) FROM messages m WHERE m.conversation_id = conversations.id),
+        conversations.created_at
+    )
+'''
+
+INDEXES = {
+    'ix_conversations_user_id_session_id_last_activity_at': ['user_id', 'session_id'],
+    'ix_conversations_user_id_last_activity_at': ['user_id'],
+}
+
+
+def _backfill() -> None:
+    if context.is_offline_mode():
+        op.execute(BACKFILL)
+        return
+    # Primary-key ranges, each committed on its own under the autocommit block
+    bind = op.get_bind()
+    batch = sa.text(BACKFILL + 'WHERE id > :start AND id <= :stop')
+    max_id = bind.scalar(sa.text('SELECT max(id) FROM conversations')) or 0
+    for start in range(0, max_id, BACKFILL_BATCH):
+        bind.execute(batch, {'start': start, 'stop': start + BACKFILL_BATCH})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Batch mode only rebuilds the table on SQLite, which cannot ADD COLUMN
+    # with a non-constant default; Postgres gets plain ALTERs, and a now()
+    # default is stored in the catalog without rewriting the table.
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.add_column(sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('last_message_preview', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column(
+            'last_activity_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False,
+        ))
+
+    with op.get_context().autocommit_block():
+        _backfill()
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                'conversations',
+                [*columns, sa.text('last_activity_at DESC'), sa.text('id DESC')],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='conversations', postgresql_concurrently=True)
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.drop_column('last_activity_at')
+        batch_op.drop_column('last_message_preview')
+        batch_op.drop_column('last_message_at')
+        batch_op.drop_column('message_count')
@@ -0,0 +1,31 @@
+"""conversation version for conditional reads
+
+Revision ID: c4a8e6f0d215
+Revises: b9e4d2a6f173
+Create Date: 2026-03-09 11:07:45.332918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e6f0d215'
+down_revision: Union[str, Sequence[str], None] = 'b9e4d2a6f173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default: no table rewrite on Postgres, and no ETag has been
+    # issued yet, so every row can start at 0
+    op.add_column('conversations', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.drop_column('version')
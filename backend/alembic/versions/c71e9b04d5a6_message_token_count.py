@@ -0,0 +1,29 @@
+"""message token count
+
+Revision ID: c71e9b04d5a6
+Revises: 8a3d5e7c1b92
+Create Date: 2026-01-26 09:51:37.880145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71e9b04d5a6'
+down_revision: Union[str, Sequence[str], None] = '8a3d5e7c1b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable: existing rows are counted lazily at prompt assembly time
+    op.add_column('messages', sa.Column('token_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('messages', 'token_count')
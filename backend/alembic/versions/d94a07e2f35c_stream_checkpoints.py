@@ -0,0 +1,41 @@
+"""stream checkpoints
+
+Revision ID: d94a07e2f35c
+Revises: 2b8f6d13a9e0
+Create Date: 2026-02-09 11:17:52.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94a07e2f35c'
+down_revision: Union[str, Sequence[str], None] = '2b8f6d13a9e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stream_checkpoints',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_stream_checkpoints_conversation_id'), 'stream_checkpoints', ['conversation_id'], unique=False)
+    op.create_index(op.f('ix_stream_checkpoints_updated_at'), 'stream_checkpoints', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_stream_checkpoints_updated_at'), table_name='stream_checkpoints')
+    op.drop_index(op.f('ix_stream_checkpoints_conversation_id'), table_name='stream_checkpoints')
+    op.drop_table('stream_checkpoints')
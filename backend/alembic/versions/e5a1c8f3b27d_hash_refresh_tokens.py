@@ -0,0 +1,77 @@
+"""hash refresh tokens
+
+Revision ID: e5a1c8f3b27d
+Revises: d94a07e2f35c
+Create Date: 2026-02-16 09:42:11.508213
+
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c8f3b27d'
+down_revision: Union[str, Sequence[str], None] = 'd94a07e2f35c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('REFRESH_TOKEN_EXPIRE_DAYS', '7'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+
+    conn = op.get_bind()
+    refresh_tokens = sa.table(
+        'refresh_tokens',
+        sa.column('id', sa.Integer),
+        sa.column('token', sa.String),
+        sa.column('token_hash', sa.String),
+        sa.column('revoked', sa.Boolean),
+        sa.column('created_at', sa.DateTime(timezone=True)),
+    )
+
+    # Dead tokens would only be hashed to be purged later
+    cutoff = datetime.now(timezone.utc) - timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    conn.execute(
+        refresh_tokens.delete().where(
+            sa.or_(refresh_tokens.c.revoked == sa.true(), refresh_tokens.c.created_at < cutoff)
+        )
+    )
+
+    # Existing sessions stay valid: store the digest of each live token
+    if conn.dialect.name == 'postgresql':
+        # convert_to, not ::bytea, so backslashes hash as the text the client holds
+        op.execute("UPDATE refresh_tokens SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    else:
+        # SQLite has no sha256(); its tables are small enough to hash row by row
+        for row in conn.execute(sa.select(refresh_tokens.c.id, refresh_tokens.c.token)):
+            conn.execute(
+                refresh_tokens.update()
+                .where(refresh_tokens.c.id == row.id)
+                .values(token_hash=hashlib.sha256(row.token.encode('utf-8')).hexdigest())
+            )
+
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.alter_column('token_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index(op.f('ix_refresh_tokens_token'))
+        batch_op.drop_column('token')
+        batch_op.create_index(op.f('ix_refresh_tokens_token_hash'), ['token_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Plaintext tokens cannot be recovered from digests; outstanding sessions
+    # must log in again.
+    op.execute('DELETE FROM refresh_tokens')
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_index(op.f('ix_refresh_tokens_token_hash'))
+        batch_op.drop_column('token_hash')
+        batch_op.add_column(sa.Column('token', sa.String(), nullable=False))
+        batch_op.create_index(op.f('ix_refresh_tokens_token'), ['token'], unique=True)
@@ -0,0 +1,65 @@
+"""conversation soft delete and cascading foreign keys
+
+Revision ID: f2c6b9d4e1a8
+Revises: e5a1c8f3b27d
+Create Date: 2026-02-23 14:05:37.219644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6b9d4e1a8'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c8f3b27d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Child tables whose conversation_id foreign key gains ON DELETE CASCADE.
+# messages is already covered by ix_messages_conversation_id_created_at_id,
+# stream_checkpoints by ix_stream_checkpoints_conversation_id.
+CHILD_TABLES = ('messages', 'stream_checkpoints')
+
+
+def _replace_conversation_fks(ondelete: str | None) -> None:
+    # SQLite does not enforce foreign keys by default and its constraints are
+    # unnamed, so only Postgres is rewritten; the reaper deletes children
+    # explicitly either way.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # NOT VALID skips the full-table check under the exclusive lock; the
+    # VALIDATE scans run after that transaction commits, holding only a
+    # SHARE UPDATE EXCLUSIVE lock.
+    for table in CHILD_TABLES:
+        name = f'{table}_conversation_id_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(
+            name, table, 'conversations', ['conversation_id'], ['id'],
+            ondelete=ondelete, postgresql_not_valid=True,
+        )
+    with op.get_context().autocommit_block():
+        for table in CHILD_TABLES:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_conversation_id_fkey')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_conversations_deleted_at',
+        'conversations',
+        ['deleted_at'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+        sqlite_where=sa.text('deleted_at IS NOT NULL'),
+    )
+    _replace_conversation_fks('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_conversation_fks(None)
+    op.drop_index('ix_conversations_deleted_at', table_name='conversations')
+    op.drop_column('conversations', 'deleted_at')
@@ -0,0 +1,28 @@
+from fastapi import Response
+
+# Responses are per user: browsers may keep them but must revalidate each use
+CACHE_CONTROL = "private, no-cache"
+
+
+def conversation_etag(convo) -> str:
+    """Strong ETag for a conversation's reads, from its write version."""
+    return f'"{convo.id}.{convo.version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match check; uses weak comparison, as RFC 9110 requires for it."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
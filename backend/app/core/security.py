@@ -32,6 +32,12 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(sha256, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password and return a replacement hash if the stored one is outdated."""
+    sha256 = hashlib.sha256(plain_password.encode("utf-8")).hexdigest()
+    return pwd_context.verify_and_update(sha256, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -41,3 +47,8 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
 def create_refresh_token() -> str:
     return secrets.token_urlsafe(48)
+
+
+def hash_refresh_token(token: str) -> str:
+    """Digest stored in place of the token; tokens are random, so no salt or stretching is needed."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
@@ -1,9 +1,41 @@
-from sqlalchemy.orm import Session
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, case, delete, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.stream_checkpoint import StreamCheckpoint
+from app.services.history_cache import history_cache
+
+CONVERSATION_PREVIEW_CHARS = int(os.getenv("CONVERSATION_PREVIEW_CHARS", "120"))
+
+_conversations = Conversation.__table__
+
+_at = bindparam("at", type_=_conversations.c.last_message_at.type)
+# A batch that commits after a newer one must not move these backwards
+_newer_message = or_(_conversations.c.last_message_at.is_(None), _conversations.c.last_message_at <= _at)
+
+# One executemany for every conversation touched by a batch of inserts
+_record_activity = (
+    update(_conversations)
+    .where(_conversations.c.id == bindparam("convo_id"))
+    .values(
+        message_count=_conversations.c.message_count + bindparam("added"),
+        last_message_at=case((_newer_message, _at), else_=_conversations.c.last_message_at),
+        last_activity_at=case((_newer_message, _at), else_=_conversations.c.last_activity_at),
+        last_message_preview=case(
+            (_newer_message, bindparam("preview")),
+            else_=_conversations.c.last_message_preview,
+        ),
+        version=_conversations.c.version + 1,
+    )
+)
 
 
-def create_conversation(
-    db: Session,
+async def create_conversation(
+    db: AsyncSession,
     user_id: int,
     session_id: str,
     title: str | None,
@@ -14,45 +46,198 @@ def create_conversation(
         title=title,
     )
     db.add(convo)
-    db.commit()
-    db.refresh(convo)
+    await db.commit()
+    await db.refresh(convo)
     return convo
 
 
-def get_user_conversations(
-    db: Session,
+async def insert_conversations(db: AsyncSession, rows: list[dict]) -> list[int]:
+    """Batched INSERT ... RETURNING id for ``rows`` in order, without committing."""
+    result = await db.scalars(
+        insert(Conversation).returning(Conversation.id, sort_by_parameter_order=True),
+        rows,
+    )
+    return result.all()
+
+
+async def get_user_conversations(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    session_id: str | None = None,
+    before: tuple[datetime, int] | None = None,
+):
+    """Keyset page of conversations, most recently active first.
+
+    ``before`` is the ``(last_activity_at, id)`` of the last conversation on
+    the previous page, as it was when that page was read, so later activity
+    or deletion of that conversation cannot shift the next page. Reads only
+    the denormalized listing columns, served by the
+    (user_id[, session_id], last_activity_at DESC, id DESC) indexes.
+    """
+    stmt = select(Conversation).where(Conversation.user_id == user_id, Conversation.deleted_at.is_(None))
+    if session_id:
+        stmt = stmt.where(Conversation.session_id == session_id)
+    if before is not None:
+        stmt = stmt.where(tuple_(Conversation.last_activity_at, Conversation.id) < tuple_(*before))
+
+    result = await db.scalars(
+        stmt.order_by(Conversation.last_activity_at.desc(), Conversation.id.desc()).limit(limit)
+    )
+    return result.all()
+
+
+async def stream_history(
+    db: AsyncSession,
     user_id: int,
+    batch_size: int,
     session_id: str | None = None,
 ):
-    q = db.query(Conversation).filter(Conversation.user_id == user_id)
+    """Stream a user's conversations and messages as row partitions.
 
+    One query over a server-side cursor, ``batch_size`` rows per partition,
+    so memory stays flat however long the history is. Rows come grouped by
+    conversation, most recently active first, with messages in chronological
+    order; a conversation with no messages yields one row whose message
+    columns are None.
+    """
+    stmt = (
+        select(
+            Conversation.id,
+            Conversation.session_id,
+            Conversation.title,
+            Conversation.created_at,
+            Message.id,
+            Message.role,
+            Message.content,
+            Message.created_at,
+        )
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
+        .where(Conversation.user_id == user_id, Conversation.deleted_at.is_(None))
+        # Walks the listing index, then each conversation's message index,
+        # so rows flow without a sort over the whole history
+        .order_by(
+            Conversation.last_activity_at.desc(),
+            Conversation.id.desc(),
+            Message.created_at,
+            Message.id,
+        )
+        .execution_options(yield_per=batch_size)
+    )
     if session_id:
-        q = q.filter(Conversation.session_id == session_id)
+        stmt = stmt.where(Conversation.session_id == session_id)
+
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+def message_preview(content: str) -> str:
+    return content[:CONVERSATION_PREVIEW_CHARS]
 
-    return q.order_by(Conversation.created_at.desc()).all()
 
+async def record_messages(db: AsyncSession, messages) -> None:
+    """Fold newly inserted messages into their conversations' listing columns.
 
-def get_conversation(
-    db: Session,
+    Runs in the caller's transaction. ``messages`` are in insertion order, so
+    the last one per conversation becomes its preview. Rows are updated in
+    id order to keep lock order consistent between concurrent batches.
+    """
+    added = Counter(m.conversation_id for m in messages)
+    latest = {m.conversation_id: m for m in messages}
+    if not latest:
+        return
+
+    await db.execute(
+        _record_activity,
+        [
+            {
+                "convo_id": convo_id,
+                "added": added[convo_id],
+                "at": latest[convo_id].created_at,
+                "preview": message_preview(latest[convo_id].content),
+            }
+            for convo_id in sorted(latest)
+        ],
+    )
+
+
+async def reset_activity(db: AsyncSession, convo_id: int) -> None:
+    """Clear the listing columns after all of a conversation's messages are removed."""
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == convo_id)
+        .values(
+            message_count=0,
+            last_message_at=None,
+            last_message_preview=None,
+            version=Conversation.version + 1,
+        )
+    )
+
+
+async def get_conversation(
+    db: AsyncSession,
     convo_id: int,
     user_id: int,
     session_id: str,
 ):
-    return (
-        db.query(Conversation)
-        .filter(
+    return await db.scalar(
+        select(Conversation).where(
             Conversation.id == convo_id,
             Conversation.user_id == user_id,
             Conversation.session_id == session_id,
+            Conversation.deleted_at.is_(None),
         )
-        .first()
     )
 
 
-def delete_conversation(db: Session, convo_id: int, user_id: int, session_id: str):
-    convo = get_conversation(db, convo_id, user_id, session_id)
-    if not convo:
+async def delete_conversation(db: AsyncSession, convo_id: int, user_id: int, session_id: str):
+    """Soft delete: hide the conversation now and leave its rows to the reaper."""
+    deleted = await db.scalar(
+        update(Conversation)
+        .where(
+            Conversation.id == convo_id,
+            Conversation.user_id == user_id,
+            Conversation.session_id == session_id,
+            Conversation.deleted_at.is_(None),
+        )
+        .values(deleted_at=datetime.now(timezone.utc))
+        .returning(Conversation.id)
+    )
+    await db.commit()
+    if deleted is None:
         return False
-    db.delete(convo)
-    db.commit()
+    history_cache.invalidate(convo_id)
     return True
+
+
+async def get_deleted_conversation_ids(db: AsyncSession, limit: int) -> list[int]:
+    result = await db.scalars(
+        select(Conversation.id)
+        .where(Conversation.deleted_at.is_not(None))
+        .order_by(Conversation.deleted_at)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def purge_conversation(db: AsyncSession, convo_id: int):
+    """Remove a soft-deleted conversation once its messages are gone."""
+    await db.execute(delete(StreamCheckpoint).where(StreamCheckpoint.conversation_id == convo_id))
+    await db.execute(
+        delete(Conversation).where(
+            Conversation.id == convo_id,
+            Conversation.deleted_at.is_not(None),
+        )
+    )
+    await db.commit()
+
+
+async def update_summary(db: AsyncSession, convo_id: int, summary: str, summary_message_id: int):
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == convo_id)
+        .values(summary=summary, summary_message_id=summary_message_id)
+    )
+    await db.commit()
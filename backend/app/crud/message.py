@@ -1,27 +1,282 @@
 # app/crud/message.py
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.conversation import Conversation
 from app.models.message import Message
+from app.crud.conversation import record_messages, reset_activity
+from app.crud.search import index_messages, unindex_messages
+from app.services.history_cache import HistoryEntry, history_cache
+from app.services.tokenizer import MESSAGE_TOKEN_OVERHEAD, count_tokens
+
+
+def message_row(conversation_id: int, role: str, content: str) -> dict:
+    return {
+        "conversation_id": conversation_id,
+        "role": role,
+        "content": content,
+        "token_count": count_tokens(content),
+    }
+
 
-def create_message(db: Session, conversation_id: int, role: str, content: str):
-    msg = Message(
-        conversation_id=conversation_id,
-        role=role,
-        content=content
+async def insert_messages(db: AsyncSession, rows: list[dict]) -> list[Message]:
+    """INSERT ... RETURNING for ``rows`` in order, without committing.
+
+    The search index and the conversations' listing columns are updated in
+    the same transaction.
+    """
+    result = await db.scalars(
+        insert(Message).returning(Message, sort_by_parameter_order=True),
+        rows,
     )
-    db.add(msg)
-    db.commit()
-    db.refresh(msg)
+    messages = result.all()
+    await index_messages(db, messages)
+    await record_messages(db, messages)
+    return messages
+
+
+class MessageRecord(NamedTuple):
+    """One row for bulk_insert_messages; field order is the COPY column list."""
+    conversation_id: int
+    role: str
+    content: str
+    token_count: int | None
+    created_at: datetime
+
+
+async def bulk_insert_messages(db: AsyncSession, records: list[MessageRecord]) -> None:
+    """Load many messages in the caller's transaction, without committing.
+
+    Postgres streams them through COPY (the search trigger still fires per
+    row); elsewhere they go as one batched INSERT and then into the FTS
+    table. Listing columns are updated as for insert_messages, so records
+    should be in chronological order per conversation.
+    """
+    if not records:
+        return
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Locking the targets in id order also opens the transaction the
+        # COPY joins: the asyncpg adapter only sends BEGIN on first execute
+        await db.execute(
+            select(Conversation.id)
+            .where(Conversation.id.in_({r.conversation_id for r in records}))
+            .order_by(Conversation.id)
+            .with_for_update(key_share=True)
+        )
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Message.__tablename__,
+            records=records,
+            columns=MessageRecord._fields,
+        )
+    else:
+        table = Message.__table__
+        result = await db.execute(
+            insert(table).returning(table.c.id, table.c.content),
+            [r._asdict() for r in records],
+        )
+        await index_messages(db, result.all())
+
+    await record_messages(db, records)
+
+
+def remember_messages(messages: list[Message]) -> None:
+    """Feed committed messages to the in-process history cache."""
+    for msg in messages:
+        history_cache.append(msg.conversation_id, HistoryEntry(msg.role, msg.content, msg.token_count))
+
+
+async def create_message(db: AsyncSession, conversation_id: int, role: str, content: str):
+    [msg] = await insert_messages(db, [message_row(conversation_id, role, content)])
+    await db.commit()
+    remember_messages([msg])
     return msg
 
-def get_messages(db: Session, conversation_id: int):
-    return (
-        db.query(Message)
+
+async def persist_turn(
+    db: AsyncSession,
+    conversation_id: int,
+    turns: list[tuple[str, str]],
+    title: str | None = None,
+) -> list[Message]:
+    """Write a conversation turn in a single transaction.
+
+    Sets the title if the conversation has none, then inserts each
+    ``(role, content)`` pair with RETURNING, so the whole turn costs one
+    commit and no refresh round trips.
+    """
+    if title:
+        await db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation_id,
+                or_(Conversation.title.is_(None), Conversation.title == ""),
+            )
+            .values(title=title, version=Conversation.version + 1)
+        )
+
+    messages = await insert_messages(
+        db,
+        [message_row(conversation_id, role, content) for role, content in turns],
+    )
+    await db.commit()
+    remember_messages(messages)
+    return messages
+
+
+async def get_messages(db: AsyncSession, conversation_id: int):
+    result = await db.scalars(
+        select(Message)
         .filter_by(conversation_id=conversation_id)
-        .order_by(Message.created_at)
-        .all()
+        .order_by(Message.created_at, Message.id)
     )
+    return result.all()
+
+
+async def get_messages_page(
+    db: AsyncSession,
+    conversation_id: int,
+    limit: int,
+    before: int | None = None,
+    after: int | None = None,
+):
+    """Keyset page of messages in chronological order.
+
+    ``before``/``after`` are message ids; the page holds the ``limit`` messages
+    immediately older/newer than that message. With no cursor the newest page
+    is returned. Served by ix_messages_conversation_id_created_at_id.
+    """
+    stmt = select(Message).filter_by(conversation_id=conversation_id)
+    position = tuple_(Message.created_at, Message.id)
 
+    cursor_id = after if after is not None else before
+    if cursor_id is not None:
+        cursor_created_at = (
+            select(Message.created_at)
+            .where(Message.id == cursor_id, Message.conversation_id == conversation_id)
+            .scalar_subquery()
+        )
+        cursor = tuple_(cursor_created_at, cursor_id)
+
+    if after is not None:
+        result = await db.scalars(
+            stmt.where(position > cursor)
+            .order_by(Message.created_at, Message.id)
+            .limit(limit)
+        )
+        return result.all()
+
+    if before is not None:
+        stmt = stmt.where(position < cursor)
+
+    result = await db.scalars(
+        stmt.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit)
+    )
+    return list(reversed(result.all()))
+
+
+async def get_messages_since(db: AsyncSession, conversation_id: int, after: int | None, limit: int):
+    """Oldest ``limit`` messages after message id ``after`` (from the start if None)."""
+    if after is not None:
+        return await get_messages_page(db, conversation_id, limit, after=after)
+
+    result = await db.scalars(
+        select(Message)
+        .filter_by(conversation_id=conversation_id)
+        .order_by(Message.created_at, Message.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def get_prompt_history(
+    db: AsyncSession,
+    conversation_id: int,
+    since_id: int | None,
+    budget: int,
+) -> list[HistoryEntry]:
+    """The newest messages after message ``since_id`` whose stored token
+    counts fit in ``budget``, in chronological order.
+
+    A running sum over the (created_at, id) index, newest first, so the scan
+    stops at the budget rather than at a fixed number of rows. Legacy rows
+    without a token count are charged their length, which never undercounts.
+    """
+    cost = func.coalesce(Message.token_count, func.length(Message.content)) + MESSAGE_TOKEN_OVERHEAD
+    newest_first = (Message.created_at.desc(), Message.id.desc())
+    tail = (
+        select(
+            Message.role,
+            Message.content,
+            Message.token_count,
+            Message.created_at,
+            Message.id,
+            func.sum(cost).over(order_by=newest_first).label("running"),
+        )
+        .where(Message.conversation_id == conversation_id)
+        .order_by(*newest_first)
+        # Every message costs at least the overhead, so no more can fit
+        .limit(budget // MESSAGE_TOKEN_OVERHEAD)
+    )
+    if since_id is not None:
+        since_created_at = (
+            select(Message.created_at)
+            .where(Message.id == since_id, Message.conversation_id == conversation_id)
+            .scalar_subquery()
+        )
+        tail = tail.where(tuple_(Message.created_at, Message.id) > tuple_(since_created_at, since_id))
+
+    tail = tail.subquery()
+    result = await db.execute(
+        select(tail.c.role, tail.c.content, tail.c.token_count)
+        .where(tail.c.running <= budget)
+        .order_by(tail.c.created_at, tail.c.id)
+    )
+    return [HistoryEntry(*row) for row in result]
+
+
+async def get_history(db: AsyncSession, conversation_id: int, since_id: int | None) -> list[HistoryEntry]:
+    """Prompt history: the turns after the summary boundary ``since_id`` that
+    fit in the history cache's token budget, served from the cache when warm."""
+    if history_cache.enabled:
+        cached = history_cache.get(conversation_id, since_id)
+        if cached is not None:
+            return cached
+
+    token = history_cache.reserve(conversation_id)
+    try:
+        entries = await get_prompt_history(db, conversation_id, since_id, history_cache.budget)
+        history_cache.fill(conversation_id, since_id, entries, token)
+    finally:
+        history_cache.release(conversation_id, token)
+
+    return entries
+
+
+async def delete_messages_for_conversation(db: AsyncSession, conversation_id: int):
+    await unindex_messages(db, select(Message.id).filter_by(conversation_id=conversation_id))
+    await db.execute(delete(Message).filter_by(conversation_id=conversation_id))
+    await reset_activity(db, conversation_id)
+    await db.commit()
+    history_cache.invalidate(conversation_id)
+
+
+async def delete_message_batch(db: AsyncSession, conversation_id: int, batch_size: int) -> int:
+    """Delete up to ``batch_size`` of a conversation's messages in one short transaction."""
+    batch = await db.scalars(
+        select(Message.id)
+        .where(Message.conversation_id == conversation_id)
+        .limit(batch_size)
+    )
+    message_ids = batch.all()
+    if not message_ids:
+        return 0
 
-def delete_messages_for_conversation(db: Session, conversation_id: int):
-    db.query(Message).filter_by(conversation_id=conversation_id).delete()
-    db.commit()
+    await unindex_messages(db, message_ids)
+    await db.execute(delete(Message).where(Message.id.in_(message_ids)))
+    await db.commit()
+    return len(message_ids)
@@ -1,40 +1,103 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, false, insert, literal, or_, select, true, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import hash_refresh_token
 from app.models.refresh_token import RefreshToken
+from app.services.principal_cache import principal_cache
 
 
-def get_active_refresh_token(db: Session, token: str, max_age_days: int | None = None):
-    query = db.query(RefreshToken).filter(
-        RefreshToken.token == token,
-        RefreshToken.revoked == False,  # noqa: E712
-    )
-
+def _active(token: str, max_age_days: int | None):
+    """WHERE clause for an unrevoked, unexpired token. Only digests are stored."""
+    clauses = [
+        RefreshToken.token_hash == hash_refresh_token(token),
+        RefreshToken.revoked == false(),
+    ]
     if max_age_days:
-        expires_after = datetime.utcnow() - timedelta(days=max_age_days)
-        query = query.filter(RefreshToken.created_at >= expires_after)
+        clauses.append(RefreshToken.created_at >= datetime.now(timezone.utc) - timedelta(days=max_age_days))
+    return clauses
 
-    return query.first()
 
+async def get_active_refresh_token(db: AsyncSession, token: str, max_age_days: int | None = None):
+    return await db.scalar(select(RefreshToken).where(*_active(token, max_age_days)))
 
-def revoke_refresh_token(db: Session, token: str):
-    rt = db.query(RefreshToken).filter(RefreshToken.token == token).first()
-    if rt:
-        rt.revoked = True
-        db.commit()
+
+async def revoke_refresh_token(db: AsyncSession, token: str):
+    user_id = await db.scalar(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_refresh_token(token))
+        .values(revoked=True)
+        .returning(RefreshToken.user_id)
+    )
+    await db.commit()
+    if user_id is not None:
+        principal_cache.invalidate_user(user_id)
         return {"details": "Logged out"}
-    if not rt:
-        return {"error": "Invalid Credintials"}
+    return {"error": "Invalid Credintials"}
 
 
-def create_refresh_token(db: Session, user_id: int, token: str):
+async def create_refresh_token(db: AsyncSession, user_id: int, token: str):
     rt = RefreshToken(
         user_id=user_id,
-        token=token,
+        token_hash=hash_refresh_token(token),
         revoked=False,
     )
     db.add(rt)
-    db.commit()
-    db.refresh(rt)
+    await db.commit()
     return rt
+
+
+async def rotate_refresh_token(
+    db: AsyncSession,
+    token: str,
+    new_token: str,
+    max_age_days: int | None = None,
+) -> int | None:
+    """Revoke ``token`` and issue ``new_token`` to the same user, atomically.
+
+    The revoking UPDATE only matches an active token, so of two concurrent
+    rotations of the same token exactly one succeeds. Postgres does both
+    writes in a single statement; elsewhere they share one transaction.
+    Returns the user id, or None if the token was not active.
+    """
+    revoke = (
+        update(RefreshToken)
+        .where(*_active(token, max_age_days))
+        .values(revoked=True)
+        .returning(RefreshToken.user_id)
+    )
+    new_hash = hash_refresh_token(new_token)
+
+    if db.get_bind().dialect.name == "postgresql":
+        old = revoke.cte("old")
+        user_id = await db.scalar(
+            insert(RefreshToken)
+            .from_select(
+                ["token_hash", "user_id", "revoked"],
+                select(literal(new_hash), old.c.user_id, false()),
+            )
+            .returning(RefreshToken.user_id)
+        )
+    else:
+        user_id = await db.scalar(revoke)
+        if user_id is not None:
+            await db.execute(
+                insert(RefreshToken).values(token_hash=new_hash, user_id=user_id, revoked=False)
+            )
+
+    await db.commit()
+    return user_id
+
+
+async def purge_refresh_tokens(db: AsyncSession, max_age_days: int, batch_size: int) -> int:
+    """Delete up to ``batch_size`` revoked or expired tokens; returns how many went."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    batch = (
+        select(RefreshToken.id)
+        .where(or_(RefreshToken.revoked == true(), RefreshToken.created_at < cutoff))
+        .limit(batch_size)
+    )
+    result = await db.execute(delete(RefreshToken).where(RefreshToken.id.in_(batch)))
+    await db.commit()
+    return result.rowcount or 0
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.llm_response_cache import LLMResponseCache
+
+
+async def get_cached_response(db: AsyncSession, key: str) -> str | None:
+    return await db.scalar(
+        select(LLMResponseCache.response).where(
+            LLMResponseCache.key == key,
+            LLMResponseCache.expires_at > datetime.now(timezone.utc),
+        )
+    )
+
+
+async def store_cached_response(db: AsyncSession, key: str, model: str, response: str, ttl_seconds: float):
+    values = {
+        "key": key,
+        "model": model,
+        "response": response,
+        "created_at": datetime.now(timezone.utc),
+        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+    }
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(LLMResponseCache).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMResponseCache.key],
+            set_={k: stmt.excluded[k] for k in ("response", "created_at", "expires_at")},
+        )
+        await db.execute(stmt)
+    else:
+        await db.merge(LLMResponseCache(**values))
+
+    await db.commit()
+
+
+async def prune_cached_responses(db: AsyncSession, max_rows: int) -> int:
+    """Drop expired rows, then the oldest rows beyond ``max_rows``."""
+    expired = await db.execute(
+        delete(LLMResponseCache).where(LLMResponseCache.expires_at <= datetime.now(timezone.utc))
+    )
+    removed = expired.rowcount or 0
+
+    overflow = await db.scalar(select(func.count()).select_from(LLMResponseCache)) - max_rows
+    if overflow > 0:
+        # Exactly the oldest ``overflow`` rows; the key breaks created_at ties
+        oldest = (
+            select(LLMResponseCache.key)
+            .order_by(LLMResponseCache.created_at, LLMResponseCache.key)
+            .limit(overflow)
+        )
+        result = await db.execute(delete(LLMResponseCache).where(LLMResponseCache.key.in_(oldest)))
+        removed += result.rowcount or 0
+
+    await db.commit()
+    return removed
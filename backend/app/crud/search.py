@@ -0,0 +1,119 @@
+import re
+
+from sqlalchemy import column, delete, func, insert, literal_column, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+# Postgres: messages.search_vector, kept current by a trigger on INSERT and
+# indexed with GIN. SQLite: the messages_fts FTS5 table, written alongside
+# every message insert. Neither is mapped on Message; see app/models/message.py.
+SEARCH_CONFIG = "english"
+SNIPPET_START, SNIPPET_STOP = "<mark>", "</mark>"
+
+messages_fts = table("messages_fts", column("rowid"), column("content"))
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _uses_fts5(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+async def index_messages(db: AsyncSession, messages: list[Message]) -> None:
+    """Add freshly inserted messages to the SQLite FTS table; Postgres needs nothing."""
+    if messages and _uses_fts5(db):
+        await db.execute(
+            insert(messages_fts),
+            [{"rowid": m.id, "content": m.content} for m in messages],
+        )
+
+
+async def unindex_messages(db: AsyncSession, message_ids) -> None:
+    """Drop messages (ids or a SELECT of ids) from the SQLite FTS table."""
+    if _uses_fts5(db):
+        await db.execute(delete(messages_fts).where(messages_fts.c.rowid.in_(message_ids)))
+
+
+def _fts5_query(q: str) -> str | None:
+    # Quote every word so user input can never be parsed as FTS5 syntax
+    words = _WORD.findall(q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+def _pg_search(q: str):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    vector = literal_column("messages.search_vector")
+    return (
+        vector.op("@@")(query),
+        func.ts_rank_cd(vector, query),
+        func.ts_headline(
+            SEARCH_CONFIG,
+            Message.content,
+            query,
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=24, MinWords=8, MaxFragments=2",
+        ),
+    )
+
+
+def _fts5_search(match: str):
+    fts = literal_column("messages_fts")
+    return (
+        fts.op("MATCH")(match),
+        # bm25 is lower-is-better; negate so both backends rank descending
+        -func.bm25(fts),
+        func.snippet(fts, 0, SNIPPET_START, SNIPPET_STOP, "…", 16),
+    )
+
+
+async def search_messages(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    limit: int,
+    cursor: tuple[float, int] | None = None,
+    session_id: str | None = None,
+) -> list[tuple[Message, str | None, float, str]]:
+    """Rank a user's messages against ``q``, best first.
+
+    Returns ``(message, conversation_title, rank, snippet)`` rows. ``cursor``
+    is the ``(rank, message_id)`` of the last row of the previous page. Only
+    the full-text index is scanned for matches; snippets are built for the
+    returned page only.
+    """
+    def ranked(stmt):
+        stmt = stmt.join(Conversation, Conversation.id == Message.conversation_id).where(
+            matches,
+            Conversation.user_id == user_id,
+            Conversation.deleted_at.is_(None),
+        )
+        if session_id:
+            stmt = stmt.where(Conversation.session_id == session_id)
+        if cursor is not None:
+            stmt = stmt.where(tuple_(rank, Message.id) < tuple_(*cursor))
+        return stmt.order_by(rank.desc(), Message.id.desc()).limit(limit)
+
+    if _uses_fts5(db):
+        match = _fts5_query(q)
+        if match is None:
+            return []
+        matches, rank, snippet = _fts5_search(match)
+        # FTS5 auxiliary functions only work in the query that runs MATCH
+        stmt = ranked(
+            select(Message, Conversation.title, rank, snippet)
+            .select_from(messages_fts)
+            .join(Message, Message.id == messages_fts.c.rowid)
+        )
+    else:
+        matches, rank, snippet = _pg_search(q)
+        page = ranked(select(Message.id, rank.label("rank"))).subquery()
+        stmt = (
+            select(Message, Conversation.title, page.c.rank, snippet)
+            .join(page, page.c.id == Message.id)
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .order_by(page.c.rank.desc(), page.c.id.desc())
+        )
+
+    result = await db.execute(stmt)
+    return [tuple(row) for row in result.all()]
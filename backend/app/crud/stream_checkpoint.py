@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stream_checkpoint import StreamCheckpoint
+
+
+async def get_stream_checkpoint(db: AsyncSession, stream_id: str, conversation_id: int, offset: int = 0):
+    """Return ``(content after offset, completed, failed, updated_at)`` or None."""
+    result = await db.execute(
+        select(
+            func.substr(StreamCheckpoint.content, offset + 1),
+            StreamCheckpoint.completed,
+            StreamCheckpoint.failed,
+            StreamCheckpoint.updated_at,
+        ).where(
+            StreamCheckpoint.id == stream_id,
+            StreamCheckpoint.conversation_id == conversation_id,
+        )
+    )
+    return result.first()
+
+
+async def create_stream_checkpoint(
+    db: AsyncSession,
+    stream_id: str,
+    conversation_id: int,
+    content: str,
+    completed: bool,
+    failed: bool = False,
+):
+    db.add(
+        StreamCheckpoint(
+            id=stream_id,
+            conversation_id=conversation_id,
+            content=content,
+            completed=completed,
+            failed=failed,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    await db.commit()
+
+
+async def append_stream_checkpoint(db: AsyncSession, stream_id: str, text: str, completed: bool, failed: bool = False):
+    # Append in SQL so each checkpoint writes only the new text
+    await db.execute(
+        update(StreamCheckpoint)
+        .where(StreamCheckpoint.id == stream_id)
+        .values(
+            content=StreamCheckpoint.content + text,
+            completed=completed,
+            failed=failed,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    await db.commit()
+
+
+async def purge_stream_checkpoints(db: AsyncSession, older_than: datetime) -> int:
+    result = await db.execute(
+        delete(StreamCheckpoint).where(StreamCheckpoint.updated_at < older_than)
+    )
+    await db.commit()
+    return result.rowcount or 0
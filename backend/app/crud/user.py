@@ -1,18 +1,26 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
-from app.core.security import hash_password
+from app.services.password_hasher import password_hasher
 
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email))
 
 
-def create_user(db: Session, email: str, password: str):
+async def create_user(db: AsyncSession, email: str, password: str):
+    hashed_password = await password_hasher.hash(password)
     user = User(
         email=email,
-        hashed_password=hash_password(password)
+        hashed_password=hashed_password
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+
+async def update_password_hash(db: AsyncSession, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
     return user
@@ -6,3 +6,5 @@ from app.models.user import User
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.refresh_token import RefreshToken
+from app.models.llm_response_cache import LLMResponseCache
+from app.models.stream_checkpoint import StreamCheckpoint
@@ -1,8 +1,13 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
+from app.services.metrics import InstrumentedAsyncPool
+from app.services.query_stats import QUERY_STATS_ENABLED, instrument_engine
+
 ENV = os.getenv("ENV", "local")
 
 if ENV == "local":
@@ -19,6 +24,24 @@ else:
 if not DATABASE_URL:
     raise RuntimeError("Database configuration missing")
 
+# Sync drivers mapped to their asyncio counterparts
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str):
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername))
+
+
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
@@ -28,10 +51,44 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+_async_pool_options = (
+    {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+    }
+    if ASYNC_DATABASE_URL.get_backend_name() != "sqlite"
+    else {}
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    **_async_pool_options,
+)
+
+if QUERY_STATS_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+# expire_on_commit=False keeps committed objects readable without an implicit
+# (and, under asyncio, forbidden) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,32 +1,44 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.services.principal_cache import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise ValueError
-    except (JWTError, ValueError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    # Fast path: a cached token and user snapshot need neither a JWT decode
+    # nor a DB round trip (the session never checks out a connection).
+    user_id = principal_cache.get_user_id(token)
 
-    user = db.query(User).get(int(user_id))
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if user_id is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            sub = payload.get("sub")
+            if sub is None:
+                raise ValueError
+            user_id = int(sub)
+        except (JWTError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+        principal_cache.put_user_id(token, user_id, payload.get("exp"))
 
-    return user
+    principal = principal_cache.get_principal(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.put_principal(principal)
+
+    return principal
@@ -1,10 +1,22 @@
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.routers import auth, conversations, messages, stream, users
+from app.routers import auth, chat_socket, conversations, messages, stream, users
+from app.services.conversation_reaper import conversation_reaper
+from app.services.group_commit import assistant_writer
+from app.services.llm_provider import close_provider, get_provider
+from app.services.metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from app.services.query_stats import QUERY_STATS_ENABLED, QueryStatsMiddleware
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
+from app.services.response_cache import response_cache
+from app.services.single_flight import stream_flights
+from app.services.summary_service import summary_scheduler
+from app.services.token_purger import refresh_token_purger
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -15,7 +27,21 @@ ALLOWED_ORIGINS = [
 ]
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresh_token_purger.start()
+    conversation_reaper.start()
+    yield
+    await conversation_reaper.stop()
+    await refresh_token_purger.stop()
+    await summary_scheduler.shutdown()
+    await assistant_writer.stop()
+    await close_provider()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     swagger_ui_parameters={
         "url": "/api/openapi.json"
     }
@@ -32,15 +58,44 @@ if ALLOWED_ORIGINS:
         expose_headers=["*"],
     )
 
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 app.include_router(conversations.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(stream.router)
 app.include_router(messages.router)
+app.include_router(chat_socket.router)
 
 @app.get("/health")
 def health():
     return {
         "status": "ok",
-        "gemini_key_loaded": GEMINI_API_KEY is not None
+        "gemini_key_loaded": GEMINI_API_KEY is not None,
+        "password_hasher": password_hasher.stats(),
+        "response_cache": response_cache.stats(),
+        "stream_flights": stream_flights.stats(),
+        "summaries": summary_scheduler.stats(),
+        "group_commit": assistant_writer.stats(),
+        "refresh_token_purge": refresh_token_purger.stats(),
+        "conversation_reaper": conversation_reaper.stats(),
+        "llm_provider": provider.stats() if (provider := get_provider()) else None,
     }
+
+
+if METRICS_ENABLED:
+    # async so rendering runs on the event loop that updates the counters
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
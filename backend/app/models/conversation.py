@@ -1,12 +1,72 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, ForeignKey, String, Text, DateTime, Index, text
 from sqlalchemy.sql import func
 from app.db.base import Base
 
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _created_at(context):
+    return context.get_current_parameters()["created_at"]
+
+
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Partial: only soft-deleted rows awaiting the reaper are indexed
+        Index(
+            "ix_conversations_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     session_id = Column(String, index=True)
     title = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Python-side defaults keep SQLite's stored text in one format, so the
+    # listing's (last_activity_at, id) cursor compares correctly there
+    created_at = Column(DateTime(timezone=True), default=_utcnow, server_default=func.now())
+
+    # Rolling summary of every message up to and including summary_message_id
+    summary = Column(Text, nullable=True)
+    summary_message_id = Column(Integer, nullable=True)
+
+    # Set on delete; the conversation is hidden at once and its rows are
+    # removed later by the background reaper
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Listing columns, maintained by crud.conversation.record_messages on every
+    # message insert so the conversation list never touches messages.
+    # last_activity_at is the creation time until the first message arrives.
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    last_activity_at = Column(
+        DateTime(timezone=True), nullable=False, default=_created_at, server_default=func.now()
+    )
+
+    # Bumped by every write that changes what GET /conversations/{id} or its
+    # /messages return; the ETag of both (see app/core/etag.py)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+# Keyset order of GET /conversations, with and without a session_id filter
+Index(
+    "ix_conversations_user_id_session_id_last_activity_at",
+    Conversation.user_id,
+    Conversation.session_id,
+    Conversation.last_activity_at.desc(),
+    Conversation.id.desc(),
+)
+Index(
+    "ix_conversations_user_id_last_activity_at",
+    Conversation.user_id,
+    Conversation.last_activity_at.desc(),
+    Conversation.id.desc(),
+)
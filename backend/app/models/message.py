@@ -1,12 +1,38 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, Text, DateTime
+from sqlalchemy import DDL, Column, Integer, ForeignKey, String, Text, DateTime, Index, event
 from sqlalchemy.sql import func
 from app.db.base import Base
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_id_created_at_id", "conversation_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"))
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"))
     role = Column(String, nullable=False)  # "user" or "assistant"
     content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=True)  # computed once at insert; NULL for legacy rows
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Full-text search structures, kept out of the mapping so ORM queries never
+# load them (queried in app/crud/search.py). Postgres maintains a tsvector
+# column by trigger on every insert and indexes it with GIN; SQLite uses an
+# FTS5 table that the message CRUD writes in the same transaction.
+SEARCH_DDL = {
+    "postgresql": (
+        "ALTER TABLE messages ADD COLUMN search_vector tsvector",
+        "CREATE TRIGGER messages_search_vector_update BEFORE INSERT OR UPDATE OF content "
+        "ON messages FOR EACH ROW EXECUTE FUNCTION "
+        "tsvector_update_trigger(search_vector, 'pg_catalog.english', content)",
+        "CREATE INDEX ix_messages_search_vector ON messages USING gin (search_vector)",
+    ),
+    "sqlite": (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(content, tokenize='porter unicode61')",
+    ),
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Message.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, String, Text, DateTime, Boolean
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class StreamCheckpoint(Base):
+    __tablename__ = "stream_checkpoints"
+
+    id = Column(String(32), primary_key=True)  # stream id sent in SSE event ids
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), index=True, nullable=False)
+    content = Column(Text, nullable=False, default="")
+    completed = Column(Boolean, nullable=False, default=False)
+    failed = Column(Boolean, nullable=False, default=False)  # the generation raised; resuming stops
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,39 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.schemas.auth import RegisterRequest, LoginRequest, RefreshRequest
-from app.crud.user import get_user_by_email, create_user
+from app.crud.user import get_user_by_email, create_user, update_password_hash
 from app.core.security import (
-    verify_password,
     create_access_token,
     create_refresh_token as generate_refresh_token,
     REFRESH_TOKEN_EXPIRE_DAYS,
 )
-from app.crud.refresh_token import create_refresh_token, get_active_refresh_token, revoke_refresh_token
+from app.crud.refresh_token import create_refresh_token, revoke_refresh_token, rotate_refresh_token
+from app.services.password_hasher import password_hasher
+from app.services.principal_cache import principal_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", status_code=201)
-def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    if get_user_by_email(db, data.email):
+async def register(data: RegisterRequest, db: AsyncSession = Depends(get_async_db)):
+    if await get_user_by_email(db, data.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    user = create_user(db, data.email, data.password)
+    user = await create_user(db, data.email, data.password)
     return {"id": user.id, "email": user.email}
 
 
 @router.post("/login")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = get_user_by_email(db, data.email)
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_by_email(db, data.email)
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    verified, new_hash = await password_hasher.verify_and_update(data.password, user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Transparently upgrade hashes made with outdated parameters
+    if new_hash:
+        await update_password_hash(db, user, new_hash)
+
     access_token = create_access_token({"sub": str(user.id)})
 
     refresh_token = generate_refresh_token()
-    create_refresh_token(db, user.id, refresh_token)
+    await create_refresh_token(db, user.id, refresh_token)
 
     return {
         "access_token": access_token,
@@ -44,22 +53,19 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/refresh")
-def refresh_token(data: RefreshRequest, db: Session = Depends(get_db)):
-    old_rt = get_active_refresh_token(db, data.refresh_token, REFRESH_TOKEN_EXPIRE_DAYS)
+async def refresh_token(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    new_refresh_token = generate_refresh_token()
+    user_id = await rotate_refresh_token(
+        db, data.refresh_token, new_refresh_token, REFRESH_TOKEN_EXPIRE_DAYS
+    )
 
-    if not old_rt:
+    if user_id is None:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    old_rt.revoked = True
-
-    new_refresh_token = generate_refresh_token()
-    create_refresh_token(db, old_rt.user_id, new_refresh_token)
-
     access_token = create_access_token(
-        {"sub": str(old_rt.user_id)}
+        {"sub": str(user_id)}
     )
-
-    db.commit()
+    principal_cache.invalidate_user(user_id)
 
     return {
         "access_token": access_token,
@@ -70,7 +76,7 @@ def refresh_token(data: RefreshRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/logout")
-def logout(data: RefreshRequest, db: Session = Depends(get_db)):
-    res = revoke_refresh_token(db, data.refresh_token)
+async def logout(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    res = await revoke_refresh_token(db, data.refresh_token)
     return res
 
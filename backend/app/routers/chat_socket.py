@@ -0,0 +1,239 @@
+import asyncio
+import json
+import os
+import time
+from functools import partial
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from jose import jwt
+from pydantic import ValidationError
+
+from app.crud import conversation as convo_crud
+from app.db.session import AsyncSessionLocal
+from app.deps import get_current_user
+from app.schemas.message import ChatSocketAuth, ChatSocketFrame
+from app.services.chat_turns import MAX_INPUT_LENGTH, start_stream_turn, turn_events
+from app.services.metrics import ws_connections, ws_streams_in_flight
+from app.services.principal_cache import Principal
+from app.services.single_flight import stream_flights
+from app.services.stream_checkpoint import parse_event_id, resume_events
+
+WS_AUTH_TIMEOUT = float(os.getenv("WS_AUTH_TIMEOUT", "10"))
+WS_MAX_STREAMS = int(os.getenv("WS_MAX_STREAMS", "8"))
+# Outbound frames buffered per socket before its streams wait for the client
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", "64"))
+
+router = APIRouter(tags=["messages"])
+
+
+class ClientNotReading(Exception):
+    """The client kept sending frames while not reading the replies."""
+
+
+class ChatSocket:
+    """One authenticated socket carrying streams for any number of conversations.
+
+    Client frames are ChatSocketFrame JSON objects:
+
+    * ``send`` starts a turn in a conversation and streams the reply, like
+      POST /conversations/{id}/messages/stream.
+    * ``stream`` follows an existing stream from ``last_event_id``, e.g. after
+      reconnecting, like GET /conversations/{id}/messages/stream.
+    * ``cancel`` stops delivering ``ref``. The generation itself still
+      finishes and is saved, as when an SSE client disconnects.
+
+    The socket closes with 1008 when the auth token expires; clients
+    reconnect with a fresh token and resume with ``stream``.
+
+    Server frames mirror the SSE events: ``{"type": "message" | "done" |
+    "error" | "interrupted", "ref", "id", "data"}``, plus ``cancelled``.
+    A single writer sends every outbound frame. Stream frames wait for one
+    of WS_SEND_QUEUE slots, so a client that reads slowly makes its streams
+    wait rather than buffering without limit. Replies to client frames
+    (``cancelled`` and frame errors) never wait, so the receive loop keeps
+    reading and a ``cancel`` still gets through to a backed-up socket; a
+    client that keeps sending without reading is disconnected instead.
+    """
+
+    def __init__(self, websocket: WebSocket, principal: Principal, expires_at: float | None = None):
+        self.websocket = websocket
+        self.principal = principal
+        # The auth token's exp; the socket is closed when it passes
+        self.expires_at = expires_at
+        # (frame, holds a stream slot)
+        self._outbox: asyncio.Queue[tuple[dict, bool]] = asyncio.Queue()
+        self._stream_slots = asyncio.Semaphore(WS_SEND_QUEUE)
+        self._pending_replies = 0
+        self._streams: dict[str, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        writer = asyncio.create_task(self._write())
+        close_reason = None
+        try:
+            while True:
+                remaining = None if self.expires_at is None else self.expires_at - time.time()
+                try:
+                    # asyncio.timeout, unlike wait_for, never swallows a
+                    # cancellation that lands as the receive completes
+                    async with asyncio.timeout(remaining):
+                        text = await self.websocket.receive_text()
+                except TimeoutError:
+                    close_reason = "Token expired"
+                    break
+                self._dispatch(text)
+        except WebSocketDisconnect:
+            pass
+        except ClientNotReading:
+            close_reason = "Client is not reading"
+        finally:
+            tasks = [*self._streams.values(), writer]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if close_reason:
+            await self.websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=close_reason)
+
+    async def _write(self) -> None:
+        while True:
+            frame, holds_slot = await self._outbox.get()
+            await self.websocket.send_json(frame)
+            if holds_slot:
+                self._stream_slots.release()
+            else:
+                self._pending_replies -= 1
+
+    async def _send(self, ref: str | None, frame_type: str, data=None, event_id: str | None = None) -> None:
+        """Queue a stream frame, waiting while the client is WS_SEND_QUEUE frames behind."""
+        await self._stream_slots.acquire()
+        self._outbox.put_nowait((_frame(ref, frame_type, data, event_id), True))
+
+    def _reply(self, ref: str | None, frame_type: str, data=None) -> None:
+        """Queue a reply to a client frame without blocking the receive loop."""
+        if self._pending_replies >= WS_SEND_QUEUE:
+            raise ClientNotReading
+        self._pending_replies += 1
+        self._outbox.put_nowait((_frame(ref, frame_type, data), False))
+
+    def _dispatch(self, text: str) -> None:
+        try:
+            frame = ChatSocketFrame.model_validate_json(text)
+        except ValidationError as exc:
+            self._reply(_ref_of(text), "error", f"Invalid frame: {exc.errors()[0]['msg']}")
+            return
+
+        if frame.type == "cancel":
+            task = self._streams.pop(frame.ref, None)
+            if task is not None:
+                task.cancel()
+            self._reply(frame.ref, "cancelled")
+            return
+
+        if frame.ref in self._streams:
+            self._reply(frame.ref, "error", "ref already in use")
+        elif len(self._streams) >= WS_MAX_STREAMS:
+            self._reply(frame.ref, "error", "Too many concurrent streams")
+        else:
+            task = asyncio.create_task(self._stream(frame))
+            self._streams[frame.ref] = task
+            task.add_done_callback(partial(self._forget, frame.ref))
+
+    def _forget(self, ref: str, task: asyncio.Task) -> None:
+        # A cancelled task may finish after its ref was reused by a new stream
+        if self._streams.get(ref) is task:
+            del self._streams[ref]
+
+    async def _stream(self, frame: ChatSocketFrame) -> None:
+        try:
+            if frame.type == "send":
+                if not frame.content:
+                    raise ValueError("content required")
+                if len(frame.content) > MAX_INPUT_LENGTH:
+                    raise ValueError("Message too long")
+                convo = await self._conversation(frame)
+                flight = start_stream_turn(convo, frame.content, frame.use_cache, frame.request_id)
+                await self._deliver(frame.ref, turn_events(flight))
+            else:
+                resume_from = parse_event_id(frame.last_event_id)
+                if not resume_from:
+                    raise ValueError("last_event_id required")
+                convo = await self._conversation(frame)
+                await self._deliver(frame.ref, resume_events(stream_flights, convo.id, *resume_from))
+        except ValueError as exc:
+            await self._send(frame.ref, "error", str(exc))
+        except Exception as exc:
+            print("Chat socket stream error:", exc)
+            await self._send(frame.ref, "error", "stream failed")
+
+    async def _conversation(self, frame: ChatSocketFrame):
+        async with AsyncSessionLocal() as db:
+            convo = await convo_crud.get_conversation(
+                db,
+                convo_id=frame.conversation_id,
+                user_id=self.principal.id,
+                session_id=frame.session_id,
+            )
+        if not convo:
+            raise ValueError("Conversation not found")
+        return convo
+
+    async def _deliver(self, ref: str, events) -> None:
+        ws_streams_in_flight.inc()
+        try:
+            async for event in events:
+                await self._send(ref, event["event"], event["data"], event.get("id"))
+        finally:
+            ws_streams_in_flight.dec()
+
+
+def _frame(ref: str | None, frame_type: str, data=None, event_id: str | None = None) -> dict:
+    frame = {"type": frame_type, "ref": ref, "data": data}
+    if event_id is not None:
+        frame["id"] = event_id
+    return frame
+
+
+def _ref_of(text: str):
+    try:
+        ref = json.loads(text).get("ref")
+    except (ValueError, AttributeError):
+        return None
+    return ref if isinstance(ref, str) else None
+
+
+async def _authenticate(websocket: WebSocket) -> tuple[Principal, float | None] | None:
+    """Read the auth frame and resolve it exactly as an HTTP request would be.
+
+    Returns the principal and the token's expiry as a Unix timestamp.
+    """
+    try:
+        auth = ChatSocketAuth.model_validate_json(
+            await asyncio.wait_for(websocket.receive_text(), WS_AUTH_TIMEOUT)
+        )
+        async with AsyncSessionLocal() as db:
+            principal = await get_current_user(token=auth.token, db=db)
+    except (asyncio.TimeoutError, ValidationError, HTTPException):
+        return None
+    # get_current_user has verified the signature and exp already
+    return principal, jwt.get_unverified_claims(auth.token).get("exp")
+
+
+@router.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    # Authenticate once per connection, with the token in the first frame
+    # rather than the URL so it stays out of access logs
+    await websocket.accept()
+    try:
+        authenticated = await _authenticate(websocket)
+    except WebSocketDisconnect:
+        return
+    if authenticated is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication failed")
+        return
+    principal, expires_at = authenticated
+
+    await websocket.send_json({"type": "ready", "ref": None, "data": {"user_id": principal.id}})
+    ws_connections.inc()
+    try:
+        await ChatSocket(websocket, principal, expires_at).run()
+    finally:
+        ws_connections.dec()
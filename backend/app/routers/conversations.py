@@ -1,24 +1,42 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+import base64
+import os
+import zlib
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.conversation import ConversationCreate, ConversationOut
-from app.db.session import get_db
+from app.schemas.message import MessageSearchPage
+from app.db.session import get_async_db
 from app.deps import get_current_user
-from app.models.user import User
+from app.core.etag import conversation_etag, etag_matches, not_modified, set_etag
+from app.services.principal_cache import Principal
+from app.services.history_export import export_ndjson, gzip_chunks
+from app.services.history_import import HistoryImporter, HistoryImportError, HistoryImportTooLarge, gunzip_chunks
 from app.crud import conversation as convo_crud
 from app.crud import message as msg_crud
+from app.crud import search as search_crud
 from fastapi import HTTPException
 
 
+CONVERSATION_PAGE_SIZE = int(os.getenv("CONVERSATION_PAGE_SIZE", "50"))
+MAX_CONVERSATION_PAGE_SIZE = int(os.getenv("MAX_CONVERSATION_PAGE_SIZE", "200"))
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+MAX_SEARCH_PAGE_SIZE = int(os.getenv("MAX_SEARCH_PAGE_SIZE", "100"))
+MAX_SEARCH_QUERY_LENGTH = int(os.getenv("MAX_SEARCH_QUERY_LENGTH", "200"))
+MAX_IMPORT_BATCH_SIZE = int(os.getenv("MAX_IMPORT_BATCH_SIZE", "50000"))
+
 
 router = APIRouter(prefix="/conversations")
 
 @router.post("", response_model=ConversationOut)
-def create_conversation(
+async def create_conversation(
     data: ConversationCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    return convo_crud.create_conversation(
+    return await convo_crud.create_conversation(
         db,
         user_id=current_user.id,
         session_id=data.session_id,
@@ -28,26 +46,139 @@ def create_conversation(
 
 
 @router.get("", response_model=list[ConversationOut])
-def list_conversations(
+async def list_conversations(
+    response: Response,
+    session_id: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(CONVERSATION_PAGE_SIZE, ge=1, le=MAX_CONVERSATION_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    # A full page carries X-Next-Cursor; pass it back as ``cursor`` for the next one
+    conversations = await convo_crud.get_user_conversations(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        session_id=session_id,
+        before=_parse_conversation_cursor(cursor) if cursor else None,
+    )
+    if len(conversations) == limit:
+        response.headers["X-Next-Cursor"] = _conversation_cursor(conversations[-1])
+    return conversations
+
+
+def _conversation_cursor(conversation) -> str:
+    # Opaque to clients and safe to put in a query string as is
+    position = f"{conversation.last_activity_at.isoformat()}:{conversation.id}"
+    return base64.urlsafe_b64encode(position.encode()).rstrip(b"=").decode()
+
+
+def _parse_conversation_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        activity, _, conversation_id = position.rpartition(":")
+        return datetime.fromisoformat(activity), int(conversation_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_search_cursor(cursor: str) -> tuple[float, int]:
+    rank, _, message_id = cursor.rpartition(":")
+    try:
+        return float(rank), int(message_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Declared before /{conversation_id} so "search" is not taken for an id
+@router.get("/search", response_model=MessageSearchPage)
+async def search_conversations(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
     session_id: str | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    return convo_crud.get_user_conversations(
+    rows = await search_crud.search_messages(
         db,
         user_id=current_user.id,
+        q=q,
+        limit=limit,
+        cursor=_parse_search_cursor(cursor) if cursor else None,
         session_id=session_id,
     )
 
+    next_cursor = None
+    if len(rows) == limit:
+        last_message, _, last_rank, _ = rows[-1]
+        next_cursor = f"{last_rank!r}:{last_message.id}"
+
+    return {
+        "results": [
+            {"message": message, "conversation_title": title, "rank": rank, "snippet": snippet}
+            for message, title, rank, snippet in rows
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+# Declared before /{conversation_id} so "export" is not taken for an id
+@router.get("/export")
+async def export_conversations(
+    session_id: str | None = None,
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_user),
+):
+    # Streams from a server-side cursor in its own session; nothing is
+    # buffered beyond one batch of rows
+    body = export_ndjson(current_user.id, session_id)
+    filename = "conversations.ndjson"
+    media_type = "application/x-ndjson"
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import")
+async def import_conversations(
+    request: Request,
+    batch_size: int | None = Query(None, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+    current_user: Principal = Depends(get_current_user),
+):
+    # The body is parsed as it arrives and written one batch per transaction;
+    # send Content-Encoding: gzip to upload the gzip export as is
+    body = request.stream()
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        body = gunzip_chunks(body)
+
+    importer = HistoryImporter(current_user.id, **({"batch_size": batch_size} if batch_size else {}))
+    try:
+        return await importer.run(body)
+    except (HistoryImportError, zlib.error) as exc:
+        raise HTTPException(
+            status_code=413 if isinstance(exc, HistoryImportTooLarge) else 400,
+            detail={"error": str(exc), "imported": importer.report()},
+        )
+
 
 @router.get("/{conversation_id}")
-def get_conversation(
+async def get_conversation(
     conversation_id: int,
     session_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    convo = convo_crud.get_conversation(
+    convo = await convo_crud.get_conversation(
         db,
         convo_id=conversation_id,
         user_id=current_user.id,
@@ -57,7 +188,13 @@ def get_conversation(
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    messages = msg_crud.get_messages(db, conversation_id)
+    # Unchanged since the client's copy: answer before loading any messages
+    etag = conversation_etag(convo)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    messages = await msg_crud.get_messages(db, conversation_id)
 
     return {
         "id": convo.id,
@@ -69,23 +206,14 @@ def get_conversation(
 
 
 @router.delete("/{conversation_id}", status_code=204)
-def delete_conversation(
+async def delete_conversation(
     conversation_id: int,
     session_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    convo = convo_crud.get_conversation(
-        db,
-        convo_id=conversation_id,
-        user_id=current_user.id,
-        session_id=session_id,
-    )
-    if not convo:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    msg_crud.delete_messages_for_conversation(db, conversation_id)
-    deleted = convo_crud.delete_conversation(db, conversation_id, current_user.id, session_id)
+    # Marks the conversation deleted; conversation_reaper removes its messages
+    deleted = await convo_crud.delete_conversation(db, conversation_id, current_user.id, session_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return
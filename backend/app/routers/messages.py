@@ -1,47 +1,42 @@
 import os
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
+from app.core.etag import conversation_etag, etag_matches, not_modified, set_etag
 from app.crud import conversation as convo_crud
 from app.crud import message as msg_crud
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.deps import get_current_user
-from app.models.user import User
-from app.schemas.message import MessageCreate, MessagePairOut
-from app.services.chat_service import generate_assistant_reply, stream_assistant_reply
+from app.services.chat_turns import MAX_INPUT_LENGTH, reply_turn, start_stream_turn, turn_events
+from app.services.principal_cache import Principal
+from app.services.single_flight import stream_flights
+from app.services.stream_checkpoint import parse_event_id, resume_events
+from app.schemas.message import MessageCreate, MessageOut, MessagePairOut
 
 router = APIRouter(prefix="/conversations", tags=["messages"])
 
-MAX_INPUT_LENGTH = int(os.getenv("MAX_INPUT_LENGTH", "2000"))
-MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "10"))
-
-
-def _build_history_context(messages):
-    """Trim and map history into the shape expected by the model layer."""
-    return [
-        {"role": m.role, "content": m.content}
-        for m in messages[-MAX_HISTORY_MESSAGES:]
-    ]
+MESSAGE_PAGE_SIZE = int(os.getenv("MESSAGE_PAGE_SIZE", "50"))
+MAX_MESSAGE_PAGE_SIZE = int(os.getenv("MAX_MESSAGE_PAGE_SIZE", "200"))
 
 
 @router.post(
     "/{conversation_id}/messages",
     response_model=MessagePairOut,
 )
-def add_user_message_and_reply(
+async def add_user_message_and_reply(
     conversation_id: int,
     session_id: str,
     data: MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     if len(data.content) > MAX_INPUT_LENGTH:
         raise HTTPException(status_code=400, detail="Message too long")
 
-    convo = convo_crud.get_conversation(
+    convo = await convo_crud.get_conversation(
         db,
         convo_id=conversation_id,
         user_id=current_user.id,
@@ -50,30 +45,7 @@ def add_user_message_and_reply(
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    if not convo.title:
-        convo.title = data.content[:60]
-        db.add(convo)
-        db.commit()
-        db.refresh(convo)
-
-    history = msg_crud.get_messages(db, conversation_id)
-    history_context = _build_history_context(history)
-
-    user_msg = msg_crud.create_message(
-        db,
-        conversation_id=conversation_id,
-        role="user",
-        content=data.content,
-    )
-
-    assistant_text = generate_assistant_reply(data.content, history_context)
-
-    assistant_msg = msg_crud.create_message(
-        db,
-        conversation_id=conversation_id,
-        role="assistant",
-        content=assistant_text,
-    )
+    user_msg, assistant_msg = await reply_turn(db, convo, data.content, data.use_cache)
 
     return {
         "user_message": user_msg,
@@ -88,12 +60,13 @@ async def stream_user_message_and_reply(
     conversation_id: int,
     session_id: str,
     data: MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    last_event_id: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     if len(data.content) > MAX_INPUT_LENGTH:
         raise HTTPException(status_code=400, detail="Message too long")
-    convo = convo_crud.get_conversation(
+    convo = await convo_crud.get_conversation(
         db,
         convo_id=conversation_id,
         user_id=current_user.id,
@@ -102,57 +75,67 @@ async def stream_user_message_and_reply(
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    if not convo.title:
-        convo.title = data.content[:60]
-        db.add(convo)
-        db.commit()
-        db.refresh(convo)
+    # A reconnect resumes the interrupted stream instead of starting a new turn
+    resume_from = parse_event_id(last_event_id)
+    if resume_from:
+        stream_id, offset = resume_from
+        return EventSourceResponse(
+            resume_events(stream_flights, conversation_id, stream_id, offset)
+        )
+
+    flight = start_stream_turn(convo, data.content, data.use_cache, data.request_id)
+    # Event ids let a dropped client resume with Last-Event-ID
+    return EventSourceResponse(turn_events(flight))
 
-    history = msg_crud.get_messages(db, conversation_id)
-    history_context = _build_history_context(history)
 
-    user_msg = msg_crud.create_message(
+@router.get(
+    "/{conversation_id}/messages/stream",
+)
+async def resume_stream(
+    conversation_id: int,
+    session_id: str,
+    last_event_id: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
+):
+    resume_from = parse_event_id(last_event_id)
+    if not resume_from:
+        raise HTTPException(status_code=400, detail="Last-Event-ID header required")
+
+    convo = await convo_crud.get_conversation(
         db,
-        conversation_id=conversation_id,
-        role="user",
-        content=data.content,
+        convo_id=conversation_id,
+        user_id=current_user.id,
+        session_id=session_id,
     )
-    history_context.append({"role": "user", "content": data.content})
-    async def event_generator():
-        chunks = []
-        async for chunk in stream_assistant_reply(data.content, history_context):
-            chunks.append(chunk)
-            yield {"event": "message", "data": chunk}
-
-        assistant_text = "".join(chunks).strip()
-
-        # If streaming produced nothing, fall back to a single reply so the frontend sees something.
-        if not assistant_text:
-            assistant_text = generate_assistant_reply(data.content, history_context)
-            yield {"event": "message", "data": assistant_text}
-
-        msg_crud.create_message(
-            db,
-            conversation_id=conversation_id,
-            role="assistant",
-            content=assistant_text or "[empty response]",
-        )
-        yield {"event": "done", "data": "complete"}
+    if not convo:
+        raise HTTPException(status_code=404, detail="Conversation not found")
 
-    return EventSourceResponse(event_generator())
+    stream_id, offset = resume_from
+    return EventSourceResponse(
+        resume_events(stream_flights, conversation_id, stream_id, offset)
+    )
 
 
 @router.get(
     "/{conversation_id}/messages",
-    response_model=List[MessagePairOut],
+    response_model=List[MessageOut],
 )
-def list_messages(
+async def list_messages(
     conversation_id: int,
     session_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    before: int | None = None,
+    after: int | None = None,
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user),
 ):
-    convo = convo_crud.get_conversation(
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    convo = await convo_crud.get_conversation(
         db,
         convo_id=conversation_id,
         user_id=current_user.id,
@@ -161,4 +144,16 @@ def list_messages(
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    return msg_crud.get_messages(db, conversation_id)
+    # The page is a function of the URL and the conversation's version
+    etag = conversation_etag(convo)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    return await msg_crud.get_messages_page(
+        db,
+        conversation_id,
+        limit=limit,
+        before=before,
+        after=after,
+    )
@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends
 from app.deps import get_current_user
-from app.models.user import User
+from app.services.principal_cache import Principal
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me")
-def read_me(current_user: User = Depends(get_current_user)):
+async def read_me(current_user: Principal = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email
@@ -12,6 +12,10 @@ class ConversationOut(BaseModel):
     session_id: str
     title: str | None
     created_at: datetime
+    message_count: int = 0
+    last_message_at: datetime | None = None
+    last_message_preview: str | None = None
+    last_activity_at: datetime | None = None
 
     class Config:
         from_attributes = True
@@ -1,8 +1,11 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Literal
 
 class MessageCreate(BaseModel):
     content: str
+    use_cache: bool = False  # opt in to replaying an identical earlier reply
+    request_id: str | None = None  # client-generated; a retry reusing it joins the stream in flight
 
 class MessageOut(BaseModel):
     id: int
@@ -17,3 +20,27 @@ class MessageOut(BaseModel):
 class MessagePairOut(BaseModel):
     user_message: MessageOut
     assistant_message: MessageOut
+
+class MessageSearchHit(BaseModel):
+    message: MessageOut
+    conversation_title: str | None
+    rank: float
+    snippet: str  # matched terms wrapped in <mark></mark>
+
+class MessageSearchPage(BaseModel):
+    results: list[MessageSearchHit]
+    next_cursor: str | None  # pass back as ``cursor`` for the next page
+
+class ChatSocketAuth(BaseModel):
+    type: Literal["auth"]
+    token: str  # access token, as in the Authorization header
+
+class ChatSocketFrame(BaseModel):
+    type: Literal["send", "stream", "cancel"]
+    ref: str  # client-chosen; tags every frame sent back for this request
+    conversation_id: int | None = None
+    session_id: str | None = None
+    content: str | None = None  # send
+    use_cache: bool = False  # send
+    request_id: str | None = None  # send; as in MessageCreate
+    last_event_id: str | None = None  # stream
@@ -1,81 +1,196 @@
 import os
+import re
+import time
 from typing import AsyncGenerator, List
 
-from groq import Groq
-
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-MAX_INPUT_LENGTH = int(os.getenv("MAX_INPUT_LENGTH", "2000"))
-MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "10"))
-
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.services.flush_policy import ChunkBuffer, FlushPolicy, default_flush_policy, paced_deltas
+from app.services import metrics
+from app.services.llm_provider import LLMProvider, get_provider
+from app.services.response_cache import response_cache
+from app.services.tokenizer import message_cost
 
-def _build_messages(prompt: str, history: List[dict]) -> list[dict]:
-  messages: list[dict] = []
-
-  for msg in history[-MAX_HISTORY_MESSAGES:]:
-    messages.append({
-      "role": str(msg.get("role", "")),
-      "content": str(msg.get("content", "")),
+MAX_INPUT_LENGTH = int(os.getenv("MAX_INPUT_LENGTH", "2000"))
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "400"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+FALLBACK_REPLY = "I couldn't generate a reply right now."
+
+
+def _build_messages(prompt: str, history: List[dict], summary: str | None = None) -> list[dict]:
+    """Pack history newest-first into PROMPT_TOKEN_BUDGET, then append the prompt.
+
+    History entries may carry a precomputed ``token_count`` so stored turns are
+    never re-tokenized. Packing stops at the first turn that does not fit, so
+    the kept history is always a contiguous tail. A conversation summary, when
+    present, is sent first as a system message and charged to the budget.
+    """
+    prompt = str(prompt[:MAX_INPUT_LENGTH])
+    budget = PROMPT_TOKEN_BUDGET - message_cost(prompt)
+
+    preamble: list[dict] = []
+    if summary:
+        summary_text = f"Summary of the earlier conversation:\n{summary}"
+        budget -= message_cost(summary_text)
+        preamble.append({"role": "system", "content": summary_text})
+
+    packed: list[dict] = []
+    for msg in reversed(history):
+        content = str(msg.get("content", ""))
+        cost = message_cost(content, msg.get("token_count"))
+        if cost > budget:
+            break
+        budget -= cost
+
+        packed.append({
+            "role": str(msg.get("role", "")),
+            "content": content,
+        })
+
+    packed.reverse()
+    packed[:0] = preamble
+    packed.append({
+        "role": "user",
+        "content": prompt,
     })
 
-  messages.append({
-    "role": "user",
-    "content": str(prompt[:MAX_INPUT_LENGTH]),
-  })
+    return packed
+
 
-  return messages
+def _cache_key(provider: LLMProvider, messages: list[dict]) -> str:
+    return response_cache.make_key(provider.model, messages, LLM_TEMPERATURE, LLM_MAX_TOKENS)
 
 
-def generate_assistant_reply(prompt: str, history: list[dict]) -> str:
-  if not client:
-    return "Model is not configured."
+def _prompt_chars(messages: list[dict]) -> int:
+    return sum(len(m["content"]) for m in messages)
 
-  completion = client.chat.completions.create(
-      model=GROQ_MODEL,
-      messages=_build_messages(prompt, history),
-      temperature=0.7,
-      max_tokens=400,
-  )
 
-  return completion.choices[0].message.content
+def _replay_chunks(text: str) -> list[str]:
+    """Split a cached reply into word-sized chunks, like a live stream."""
+    return re.findall(r"\S+\s*|\s+", text)
 
 
-async def stream_assistant_reply(prompt: str, history: list[dict]) -> AsyncGenerator[str, None]:
-    if not client:
+async def _store_cached(db: AsyncSession, key: str, model: str, text: str) -> None:
+    """Best effort: a failed cache write must never fail the turn it follows."""
+    try:
+        await response_cache.put(db, key, model, text)
+    except Exception as exc:
+        print("Response cache write error:", exc)
+        # Leave the session usable for the caller's own writes
+        await db.rollback()
+
+
+async def generate_assistant_reply_async(
+    prompt: str,
+    history: list[dict],
+    cache_db: AsyncSession | None = None,
+    summary: str | None = None,
+) -> str:
+    """Pass ``cache_db`` to opt this request into the response cache."""
+    provider = get_provider()
+    if not provider:
+        return "Model is not configured."
+
+    messages = _build_messages(prompt, history, summary)
+    cache_key = _cache_key(provider, messages) if cache_db is not None else None
+    if cache_key:
+        cached = await response_cache.get(cache_db, cache_key)
+        if cached is not None:
+            return cached
+        # End the lookup's transaction so the connection goes back to the
+        # pool instead of idling in transaction for the whole model call
+        await cache_db.commit()
+
+    metrics.llm_prompt_chars.observe(_prompt_chars(messages), provider.name)
+    start = time.perf_counter()
+    try:
+        text = await provider.complete(messages, LLM_TEMPERATURE, LLM_MAX_TOKENS)
+    except Exception:
+        metrics.llm_upstream_errors.inc(provider.name, "complete")
+        raise
+    metrics.llm_request_duration.observe(time.perf_counter() - start, provider.name, "complete")
+    metrics.llm_completion_chars.observe(len(text or ""), provider.name)
+
+    if cache_key and text:
+        await _store_cached(cache_db, cache_key, provider.model, text)
+
+    return text
+
+
+async def stream_assistant_reply(
+    prompt: str,
+    history: list[dict],
+    cache_db: AsyncSession | None = None,
+    summary: str | None = None,
+    flush_policy: FlushPolicy | None = None,
+) -> AsyncGenerator[str, None]:
+    """Pass ``cache_db`` to opt this request into the response cache.
+
+    Upstream tokens are buffered and re-chunked by ``flush_policy``
+    (``STREAM_FLUSH_POLICY`` by default).
+    """
+    flush_policy = flush_policy or default_flush_policy
+    provider = get_provider()
+    if not provider:
         yield "Model is not configured."
         return
 
-    buffer = ""
+    messages = _build_messages(prompt, history, summary)
+    cache_key = _cache_key(provider, messages) if cache_db is not None else None
+    if cache_key:
+        cached = await response_cache.get(cache_db, cache_key)
+        if cached is not None:
+            for chunk in _replay_chunks(cached):
+                yield chunk
+            return
+        await cache_db.commit()
+
+    buffer = ChunkBuffer()
+    produced: list[str] = []
+    metrics.llm_prompt_chars.observe(_prompt_chars(messages), provider.name)
+    start = time.perf_counter()
+    first_token_at = None
+    deltas = 0
 
     try:
-        stream = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=_build_messages(prompt, history),
-            temperature=0.7,
-            max_tokens=400,
-            stream=True,
-        )
-
-        for chunk in stream:
-            delta = chunk.choices[0].delta
-            text = getattr(delta, "content", None)
-
-            if not text:
+        upstream = provider.stream(messages, LLM_TEMPERATURE, LLM_MAX_TOKENS)
+        async for text in paced_deltas(upstream, flush_policy, buffer):
+            if text is None:
+                # The policy's deadline passed while the upstream stalled
+                out = buffer.drain()
+                produced.append(out)
+                yield out
                 continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics.llm_time_to_first_token.observe(first_token_at - start, provider.name)
+            deltas += 1
+            buffer.append(text)
 
-            buffer += text
-
-            # Flush buffer when it ends cleanly
-            if buffer.endswith((" ", "\n", ".", ",", "!", "?", ":", ";")):
-                yield buffer
-                buffer = ""
+            if flush_policy.should_flush(buffer, text):
+                out = buffer.drain()
+                produced.append(out)
+                yield out
 
         if buffer:
-            yield buffer
+            out = buffer.drain()
+            produced.append(out)
+            yield out
 
     except Exception as exc:
-        print("Groq stream error:", exc)
-        yield "I couldn't generate a reply right now."
+        print(f"{provider.name} stream error:", exc)
+        metrics.llm_upstream_errors.inc(provider.name, "stream")
+        yield FALLBACK_REPLY
+        return
+
+    finished_at = time.perf_counter()
+    metrics.llm_request_duration.observe(finished_at - start, provider.name, "stream")
+    metrics.llm_completion_chars.observe(sum(map(len, produced)), provider.name)
+    # Each upstream delta is roughly one token
+    if deltas > 1 and finished_at > first_token_at:
+        metrics.llm_tokens_per_second.observe((deltas - 1) / (finished_at - first_token_at), provider.name)
 
+    # Only complete, successful generations are cached
+    if cache_key and produced:
+        await _store_cached(cache_db, cache_key, provider.model, "".join(produced))
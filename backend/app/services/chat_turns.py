@@ -0,0 +1,139 @@
+import os
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import message as msg_crud
+from app.db.session import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.services.chat_service import FALLBACK_REPLY, generate_assistant_reply_async, stream_assistant_reply
+from app.services.group_commit import assistant_writer
+from app.services.single_flight import Flight, stream_flights
+from app.services.stream_checkpoint import StreamCheckpointer, event_id, final_event
+from app.services.summary_service import summary_scheduler
+
+MAX_INPUT_LENGTH = int(os.getenv("MAX_INPUT_LENGTH", "2000"))
+
+
+def build_history_context(messages):
+    """Map history into the shape expected by the model layer."""
+    return [
+        {"role": m.role, "content": m.content, "token_count": m.token_count}
+        for m in messages
+    ]
+
+
+async def reply_turn(db: AsyncSession, convo: Conversation, content: str, use_cache: bool):
+    """Generate the whole reply, then persist the turn; returns (user_msg, assistant_msg)."""
+    history = await msg_crud.get_history(db, convo.id, convo.summary_message_id)
+    history_context = build_history_context(history)
+    # Release the request's connection while the model runs
+    await db.commit()
+
+    try:
+        assistant_text = await generate_assistant_reply_async(
+            content,
+            history_context,
+            cache_db=db if use_cache else None,
+            summary=convo.summary,
+        )
+    except Exception as exc:
+        # Keep the user's message, as the stream path does
+        print("Chat reply error:", exc)
+        assistant_text = FALLBACK_REPLY
+
+    # Title, user and assistant message land in one transaction
+    user_msg, assistant_msg = await msg_crud.persist_turn(
+        db,
+        convo.id,
+        [("user", content), ("assistant", assistant_text)],
+        title=content[:60] if not convo.title else None,
+    )
+    summary_scheduler.schedule(convo.id)
+    return user_msg, assistant_msg
+
+
+def start_stream_turn(
+    convo: Conversation,
+    content: str,
+    use_cache: bool,
+    request_id: str | None = None,
+) -> Flight:
+    """Start the streamed turn for ``content``, or join the one already in flight.
+
+    Submissions carrying the same client ``request_id`` (double clicks,
+    client retries, a second transport) attach to the generation already
+    running instead of starting and persisting another.
+    """
+    conversation_id = convo.id
+
+    async def produce_turn(flight: Flight):
+        # Runs detached from the request, so it owns its own session
+        async with AsyncSessionLocal() as turn_db:
+            checkpointer = StreamCheckpointer(turn_db, flight.id, conversation_id)
+            try:
+                history = await msg_crud.get_history(turn_db, conversation_id, convo.summary_message_id)
+                history_context = build_history_context(history)
+
+                await msg_crud.persist_turn(
+                    turn_db,
+                    conversation_id,
+                    [("user", content)],
+                    title=content[:60] if not convo.title else None,
+                )
+
+                chunks = []
+                async for chunk in stream_assistant_reply(
+                    content,
+                    history_context,
+                    cache_db=turn_db if use_cache else None,
+                    summary=convo.summary,
+                ):
+                    chunks.append(chunk)
+                    await flight.publish(chunk)
+                    await checkpointer.add(chunk)
+
+                assistant_text = "".join(chunks).strip()
+
+                # If streaming produced nothing, fall back to a single reply so the frontend sees something.
+                if not assistant_text:
+                    try:
+                        assistant_text = await generate_assistant_reply_async(
+                            content,
+                            history_context,
+                            summary=convo.summary,
+                        )
+                    except Exception as exc:
+                        print("Chat reply error:", exc)
+                        assistant_text = FALLBACK_REPLY
+                    await flight.publish(assistant_text)
+                    await checkpointer.add(assistant_text)
+
+                await assistant_writer.write(
+                    turn_db,
+                    conversation_id,
+                    "assistant",
+                    assistant_text or "[empty response]",
+                )
+                await checkpointer.complete()
+            except Exception:
+                # Resuming clients poll the checkpoint; tell them to stop
+                await checkpointer.fail()
+                raise
+        summary_scheduler.schedule(conversation_id)
+
+    flight, _ = stream_flights.join_or_start(
+        stream_flights.request_key(conversation_id, request_id),
+        produce_turn,
+        conversation_id,
+    )
+    return flight
+
+
+async def turn_events(flight: Flight) -> AsyncIterator[dict]:
+    """A flight's output as SSE-shaped events whose ids allow resuming."""
+    position = 0
+    async for chunk in flight.subscribe():
+        position += len(chunk)
+        yield {"event": "message", "id": event_id(flight.id, position), "data": chunk}
+    yield final_event(flight.id, position, flight.error is not None)
@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from app.crud import conversation as convo_crud
+from app.crud import message as msg_crud
+from app.db.session import AsyncSessionLocal
+
+CONVERSATION_REAPER_INTERVAL = float(os.getenv("CONVERSATION_REAPER_INTERVAL", "30"))
+CONVERSATION_REAPER_BATCH = int(os.getenv("CONVERSATION_REAPER_BATCH", "500"))
+# Pause between message batches so large deletes never saturate the database
+CONVERSATION_REAPER_PAUSE = float(os.getenv("CONVERSATION_REAPER_PAUSE", "0.05"))
+CONVERSATION_REAPER_MAX_CONVERSATIONS = int(os.getenv("CONVERSATION_REAPER_MAX_CONVERSATIONS", "100"))
+
+
+class ConversationReaper:
+    """Removes soft-deleted conversations in the background.
+
+    Messages go in batches of ``batch_size``, each its own short transaction,
+    and the conversation row goes last. An interrupted pass just resumes on
+    the next run.
+    """
+
+    def __init__(
+        self,
+        interval: float = CONVERSATION_REAPER_INTERVAL,
+        batch_size: int = CONVERSATION_REAPER_BATCH,
+        pause: float = CONVERSATION_REAPER_PAUSE,
+        max_conversations: int = CONVERSATION_REAPER_MAX_CONVERSATIONS,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_conversations = max_conversations
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+        self.conversations = 0
+        self.messages = 0
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.reap()
+            except Exception as exc:
+                print("Conversation reaper error:", exc)
+            await asyncio.sleep(self.interval)
+
+    async def reap(self) -> int:
+        """Run one pass; returns the number of conversations removed."""
+        async with self._session_factory() as db:
+            convo_ids = await convo_crud.get_deleted_conversation_ids(db, self.max_conversations)
+
+        for convo_id in convo_ids:
+            await self.reap_conversation(convo_id)
+        return len(convo_ids)
+
+    async def reap_conversation(self, convo_id: int) -> None:
+        while True:
+            async with self._session_factory() as db:
+                deleted = await msg_crud.delete_message_batch(db, convo_id, self.batch_size)
+            self.messages += deleted
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.pause)
+
+        async with self._session_factory() as db:
+            await convo_crud.purge_conversation(db, convo_id)
+        self.conversations += 1
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "conversations": self.conversations,
+            "messages": self.messages,
+        }
+
+
+conversation_reaper = ConversationReaper()
@@ -0,0 +1,167 @@
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+# word | bytes | latency | passthrough
+STREAM_FLUSH_POLICY = os.getenv("STREAM_FLUSH_POLICY", "word")
+STREAM_FLUSH_MAX_BYTES = int(os.getenv("STREAM_FLUSH_MAX_BYTES", "64"))
+STREAM_FLUSH_MAX_LATENCY_MS = float(os.getenv("STREAM_FLUSH_MAX_LATENCY_MS", "50"))
+
+WORD_BOUNDARIES = (" ", "\n", ".", ",", "!", "?", ":", ";")
+
+
+class ChunkBuffer:
+    """Pending stream text kept as a list of parts and joined once per flush."""
+
+    __slots__ = ("parts", "size", "started")
+
+    def __init__(self):
+        self.parts: list[str] = []
+        self.size = 0
+        self.started = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.parts)
+
+    def append(self, text: str) -> None:
+        if not self.parts:
+            self.started = time.perf_counter()
+        self.parts.append(text)
+        self.size += len(text.encode())
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts.clear()
+        self.size = 0
+        return text
+
+
+class FlushPolicy(ABC):
+    """Decides, after each upstream token is buffered, whether to emit the buffer."""
+
+    name = "base"
+
+    @abstractmethod
+    def should_flush(self, buffer: ChunkBuffer, text: str) -> bool:
+        ...
+
+    def deadline(self, buffer: ChunkBuffer) -> float | None:
+        """perf_counter time by which a non-empty buffer is emitted even if no
+        further token arrives; None to wait for the next token."""
+        return None
+
+
+class PassThroughPolicy(FlushPolicy):
+    """Emit every upstream token as its own chunk."""
+
+    name = "passthrough"
+
+    def should_flush(self, buffer: ChunkBuffer, text: str) -> bool:
+        return True
+
+
+class MaxBytesPolicy(FlushPolicy):
+    """Emit once the buffer holds at least ``max_bytes`` of UTF-8."""
+
+    name = "bytes"
+
+    def __init__(self, max_bytes: int = STREAM_FLUSH_MAX_BYTES):
+        self.max_bytes = max_bytes
+
+    def should_flush(self, buffer: ChunkBuffer, text: str) -> bool:
+        return buffer.size >= self.max_bytes
+
+
+class MaxLatencyPolicy(FlushPolicy):
+    """Emit once the oldest buffered token has waited ``max_latency_ms``.
+
+    The deadline also fires on a timer (see paced_deltas), so a stalled
+    upstream cannot hold buffered text past it.
+    """
+
+    name = "latency"
+
+    def __init__(self, max_latency_ms: float = STREAM_FLUSH_MAX_LATENCY_MS):
+        self.max_latency = max_latency_ms / 1000
+
+    def should_flush(self, buffer: ChunkBuffer, text: str) -> bool:
+        return time.perf_counter() - buffer.started >= self.max_latency
+
+    def deadline(self, buffer: ChunkBuffer) -> float | None:
+        return buffer.started + self.max_latency
+
+
+class WordBoundaryPolicy(MaxBytesPolicy):
+    """Emit at whitespace or punctuation, or at ``max_bytes`` for long unbroken runs.
+
+    The byte cap keeps code, URLs and other boundary-free text from being held
+    back for the whole reply.
+    """
+
+    name = "word"
+
+    def should_flush(self, buffer: ChunkBuffer, text: str) -> bool:
+        return text.endswith(WORD_BOUNDARIES) or buffer.size >= self.max_bytes
+
+
+FLUSH_POLICIES = {
+    policy.name: policy
+    for policy in (WordBoundaryPolicy, MaxBytesPolicy, MaxLatencyPolicy, PassThroughPolicy)
+}
+
+
+def get_flush_policy(name: str = STREAM_FLUSH_POLICY) -> FlushPolicy:
+    try:
+        return FLUSH_POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown stream flush policy: {name!r}") from None
+
+
+default_flush_policy = get_flush_policy()
+
+
+async def paced_deltas(
+    deltas: AsyncIterator[str],
+    policy: FlushPolicy,
+    buffer: ChunkBuffer,
+) -> AsyncIterator[str | None]:
+    """Yield upstream deltas, and None whenever ``policy``'s deadline for a
+    non-empty ``buffer`` passes before the next delta arrives.
+
+    The pending read runs as a task that a timeout never cancels, so the
+    upstream iterator is not disturbed. Policies without a deadline read
+    the upstream directly.
+    """
+    upstream = deltas.__aiter__()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            deadline = policy.deadline(buffer) if buffer else None
+            if deadline is None and pending is None:
+                try:
+                    text = await upstream.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield text
+                continue
+
+            if pending is None:
+                pending = asyncio.ensure_future(upstream.__anext__())
+            if deadline is not None:
+                done, _ = await asyncio.wait((pending,), timeout=max(deadline - time.perf_counter(), 0))
+                if not done:
+                    yield None
+                    continue
+
+            try:
+                text = await pending
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield text
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,128 @@
+import asyncio
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import message as msg_crud
+from app.db.session import AsyncSessionLocal
+from app.models.message import Message
+from app.services.query_stats import create_background_task
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "256"))
+
+
+class GroupCommitWriter:
+    """Batches message inserts from many concurrent streams into one commit.
+
+    Writers wait at most ``window_ms`` for company; each batch is a single
+    multi-row INSERT ... RETURNING and one WAL flush on a single pooled
+    connection, instead of one commit (and connection checkout) per stream.
+    A batch that fails is retried row by row, so a bad row only fails its
+    own writer.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = GROUP_COMMIT_ENABLED,
+        window_ms: float = GROUP_COMMIT_WINDOW_MS,
+        max_batch: int = GROUP_COMMIT_MAX_BATCH,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.enabled = enabled
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.rows = 0
+
+    async def write(self, db: AsyncSession, conversation_id: int, role: str, content: str) -> Message:
+        """Persist one message, batched when enabled and directly through ``db`` otherwise."""
+        if not self.enabled:
+            return await msg_crud.create_message(db, conversation_id, role, content)
+        return await self.submit(conversation_id, role, content)
+
+    async def submit(self, conversation_id: int, role: str, content: str) -> Message:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = create_background_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((msg_crud.message_row(conversation_id, role, content), future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # None is stop()'s sentinel: commit what came before it, then exit
+            entries = [entry for entry in batch if entry is not None]
+            if entries:
+                await self._flush(entries)
+            if len(entries) < len(batch):
+                return
+
+    async def _insert(self, rows: list[dict]) -> list[Message]:
+        async with self._session_factory() as db:
+            messages = await msg_crud.insert_messages(db, rows)
+            await db.commit()
+        return messages
+
+    async def _flush(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        try:
+            messages = await self._insert([row for row, _ in batch])
+        except Exception as exc:
+            if len(batch) > 1:
+                # Retry row by row so only the bad row's writer sees the error
+                print("Group commit error, retrying rows singly:", exc)
+                for entry in batch:
+                    await self._flush([entry])
+                return
+            print("Group commit error:", exc)
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(exc)
+            return
+
+        msg_crud.remember_messages(messages)
+        self.batches += 1
+        self.rows += len(messages)
+        for (_, future), msg in zip(batch, messages):
+            if not future.done():
+                future.set_result(msg)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        if not task.done():
+            # Cancelling could abandon a batch mid-commit; let the loop finish it
+            self._queue.put_nowait(None)
+            await task
+
+        # Drain whatever was queued after the last batch
+        pending = []
+        while not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                pending.append(entry)
+        if pending:
+            await self._flush(pending)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "batches": self.batches,
+            "rows": self.rows,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+assistant_writer = GroupCommitWriter()
@@ -0,0 +1,103 @@
+import os
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+from app.services.tokenizer import message_cost
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", "1024"))
+
+
+class HistoryEntry(NamedTuple):
+    role: str
+    content: str
+    token_count: int | None = None
+
+
+class _Tail:
+    """A conversation's newest unsummarized turns and their prompt cost."""
+
+    __slots__ = ("since_id", "entries", "tokens")
+
+    def __init__(self, since_id: int | None, entries: list[HistoryEntry]):
+        self.since_id = since_id
+        self.entries = deque(entries)
+        self.tokens = sum(message_cost(e.content, e.token_count) for e in entries)
+
+
+class HistoryCache:
+    """LRU map of conversation id -> its newest turns after the summary, up to
+    ``budget`` prompt tokens.
+
+    The cache is per process: it only sees writes that go through this
+    worker's ``create_message``. Fills race with concurrent writes, so a fill
+    is only stored if no write touched the conversation while it was loading.
+    A fill remembers the summary boundary it was loaded from; reads with a
+    different boundary miss and refill.
+    """
+
+    def __init__(self, max_conversations: int = HISTORY_CACHE_SIZE, budget: int = PROMPT_TOKEN_BUDGET):
+        self.max_conversations = max_conversations
+        self.budget = budget
+        self._entries: OrderedDict[int, _Tail] = OrderedDict()
+        self._pending: dict[int, object] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_conversations > 0 and self.budget > 0
+
+    def get(self, conversation_id: int, since_id: int | None) -> list[HistoryEntry] | None:
+        tail = self._entries.get(conversation_id)
+        if tail is None or tail.since_id != since_id:
+            return None
+        self._entries.move_to_end(conversation_id)
+        return list(tail.entries)
+
+    def reserve(self, conversation_id: int) -> object:
+        token = object()
+        self._pending[conversation_id] = token
+        return token
+
+    def release(self, conversation_id: int, token: object) -> None:
+        if self._pending.get(conversation_id) is token:
+            del self._pending[conversation_id]
+
+    def fill(
+        self,
+        conversation_id: int,
+        since_id: int | None,
+        entries: list[HistoryEntry],
+        token: object,
+    ) -> None:
+        if not self.enabled or self._pending.get(conversation_id) is not token:
+            return
+        del self._pending[conversation_id]
+
+        self._entries[conversation_id] = _Tail(since_id, entries)
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_conversations:
+            self._entries.popitem(last=False)
+
+    def append(self, conversation_id: int, entry: HistoryEntry) -> None:
+        # Any in-flight fill for this conversation is now stale
+        self._pending.pop(conversation_id, None)
+
+        tail = self._entries.get(conversation_id)
+        if tail is None:
+            return
+        tail.entries.append(entry)
+        tail.tokens += message_cost(entry.content, entry.token_count)
+        while tail.tokens > self.budget and tail.entries:
+            dropped = tail.entries.popleft()
+            tail.tokens -= message_cost(dropped.content, dropped.token_count)
+
+    def invalidate(self, conversation_id: int) -> None:
+        self._pending.pop(conversation_id, None)
+        self._entries.pop(conversation_id, None)
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._entries.clear()
+
+
+history_cache = HistoryCache()
@@ -0,0 +1,66 @@
+import json
+import os
+import zlib
+from typing import AsyncIterator
+
+from app.crud import conversation as convo_crud
+from app.db.session import AsyncSessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+
+def _timestamp(value) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+async def export_ndjson(
+    user_id: int,
+    session_id: str | None = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    session_factory=AsyncSessionLocal,
+) -> AsyncIterator[bytes]:
+    """Yield a user's history as NDJSON, one chunk per cursor partition.
+
+    Each conversation is a ``{"type": "conversation", ...}`` line followed by
+    its messages as ``{"type": "message", ...}`` lines, oldest first. The
+    generator owns its session, so it can outlive the request that started it.
+    """
+    current = None
+    async with session_factory() as db:
+        async for rows in convo_crud.stream_history(db, user_id, batch_size, session_id):
+            lines = []
+            for convo_id, convo_session, title, convo_created, msg_id, role, content, msg_created in rows:
+                if convo_id != current:
+                    current = convo_id
+                    lines.append(_line({
+                        "type": "conversation",
+                        "id": convo_id,
+                        "session_id": convo_session,
+                        "title": title,
+                        "created_at": _timestamp(convo_created),
+                    }))
+                if msg_id is not None:
+                    lines.append(_line({
+                        "type": "message",
+                        "id": msg_id,
+                        "conversation_id": convo_id,
+                        "role": role,
+                        "content": content,
+                        "created_at": _timestamp(msg_created),
+                    }))
+            yield "".join(lines).encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = EXPORT_GZIP_LEVEL) -> AsyncIterator[bytes]:
+    """Compress a byte stream into a single gzip member as it goes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,282 @@
+"""Bulk import of NDJSON chat history, as written by the export.
+
+    cd backend && python -m app.services.history_import --email someone@example.com history.ndjson.gz
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable
+
+from app.crud import conversation as convo_crud
+from app.crud import message as msg_crud
+from app.crud import user as user_crud
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services.tokenizer import count_tokens
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+# Longest NDJSON line accepted, and total (decompressed) bytes per import
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(1 << 20)))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(1 << 30)))
+IMPORT_ROLES = ("user", "assistant")
+READ_CHUNK_SIZE = 1 << 20
+
+
+class HistoryImportError(ValueError):
+    """Malformed input; ``line`` is the 1-based NDJSON line it was found on,
+    or None when the problem is not tied to one line."""
+
+    def __init__(self, line: int | None, message: str):
+        super().__init__(message if line is None else f"line {line}: {message}")
+        self.line = line
+
+
+class HistoryImportTooLarge(HistoryImportError):
+    """The input went over IMPORT_MAX_BYTES or a line over IMPORT_MAX_LINE_BYTES."""
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = IMPORT_MAX_LINE_BYTES,
+) -> AsyncIterator[bytes]:
+    # Only each new chunk is scanned for newlines, and a partial line is
+    # held only up to max_line_bytes
+    pending = bytearray()
+    line = 1
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            pending += chunk[start:end]
+            if len(pending) > max_line_bytes:
+                raise HistoryImportTooLarge(line, f"line longer than {max_line_bytes} bytes")
+            yield bytes(pending)
+            pending.clear()
+            line += 1
+            start = end + 1
+        pending += chunk[start:]
+        if len(pending) > max_line_bytes:
+            raise HistoryImportTooLarge(line, f"line longer than {max_line_bytes} bytes")
+    if pending:
+        yield bytes(pending)
+
+
+async def gunzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    # Output is capped per call so a small, highly compressed body never
+    # expands in memory all at once; the rest waits in unconsumed_tail
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        while chunk:
+            data = decompressor.decompress(chunk, READ_CHUNK_SIZE)
+            if data:
+                yield data
+            chunk = decompressor.unconsumed_tail
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+async def _limit_bytes(chunks: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > max_bytes:
+            raise HistoryImportTooLarge(None, f"input larger than {max_bytes} bytes")
+        yield chunk
+
+
+def _timestamp(value, line: int) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HistoryImportError(line, f"invalid created_at {value!r}")
+    # Naive timestamps (e.g. exported from SQLite) are taken as UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class HistoryImporter:
+    """Loads NDJSON history into one user's account in batches.
+
+    The input is the export format: a ``conversation`` line, then its
+    ``message`` lines, oldest first. Conversations get new ids; messages
+    refer to the conversation id used in the file. Every ``batch_size``
+    rows go in one transaction, so a failure keeps the batches already
+    committed and the report says how far the import got.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        max_bytes: int = IMPORT_MAX_BYTES,
+        session_factory=AsyncSessionLocal,
+        on_batch: Callable[[dict], None] | None = None,
+    ):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.on_batch = on_batch
+        self._session_factory = session_factory
+        # Conversations without a session_id land in one fresh session
+        self.default_session_id = uuid.uuid4().hex
+        # File conversation id -> new id; None until its batch is written
+        self._ids: dict = {}
+        self._conversations: list[tuple[object, dict]] = []
+        self._messages: list[tuple[object, str, str, datetime]] = []
+        self._started = None
+        self.conversations = 0
+        self.messages = 0
+        self.batches = 0
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> dict:
+        self._started = time.perf_counter()
+        async with self._session_factory() as db:
+            line = 0
+            async for raw in iter_lines(_limit_bytes(chunks, self.max_bytes)):
+                line += 1
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    raise HistoryImportError(line, "invalid JSON")
+                if not isinstance(record, dict):
+                    raise HistoryImportError(line, "expected a JSON object")
+
+                self._add(record, line)
+                if len(self._messages) + len(self._conversations) >= self.batch_size:
+                    await self._flush(db)
+            await self._flush(db)
+        return self.report()
+
+    def _add(self, record: dict, line: int) -> None:
+        kind = record.get("type")
+        if kind == "conversation":
+            key = record.get("id")
+            if key is None:
+                raise HistoryImportError(line, "conversation without an id")
+            if key in self._ids:
+                raise HistoryImportError(line, f"duplicate conversation id {key!r}")
+            created_at = _timestamp(record.get("created_at"), line)
+            self._ids[key] = None
+            self._conversations.append((key, {
+                "user_id": self.user_id,
+                "session_id": record.get("session_id") or self.default_session_id,
+                "title": record.get("title"),
+                "created_at": created_at,
+                "last_activity_at": created_at,
+            }))
+        elif kind == "message":
+            key = record.get("conversation_id")
+            if key not in self._ids:
+                raise HistoryImportError(line, f"message for unknown conversation {key!r}")
+            role, content = record.get("role"), record.get("content")
+            if role not in IMPORT_ROLES:
+                raise HistoryImportError(line, f"invalid role {role!r}")
+            if not isinstance(content, str):
+                raise HistoryImportError(line, "message content must be a string")
+            self._messages.append((key, role, content, _timestamp(record.get("created_at"), line)))
+        else:
+            raise HistoryImportError(line, f"unknown record type {kind!r}")
+
+    async def _flush(self, db) -> None:
+        if not self._conversations and not self._messages:
+            return
+
+        if self._conversations:
+            new_ids = await convo_crud.insert_conversations(db, [row for _, row in self._conversations])
+            for (key, _), new_id in zip(self._conversations, new_ids):
+                self._ids[key] = new_id
+
+        await msg_crud.bulk_insert_messages(db, [
+            msg_crud.MessageRecord(self._ids[key], role, content, count_tokens(content), created_at)
+            for key, role, content, created_at in self._messages
+        ])
+        await db.commit()
+
+        self.conversations += len(self._conversations)
+        self.messages += len(self._messages)
+        self.batches += 1
+        self._conversations.clear()
+        self._messages.clear()
+        if self.on_batch is not None:
+            self.on_batch(self.report())
+
+    def report(self) -> dict:
+        seconds = time.perf_counter() - self._started if self._started is not None else 0.0
+        rows = self.conversations + self.messages
+        return {
+            "conversations": self.conversations,
+            "messages": self.messages,
+            "batches": self.batches,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        }
+
+
+async def _file_chunks(path: str) -> AsyncIterator[bytes]:
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+async def _main(args) -> None:
+    user_id = args.user_id
+    if args.email:
+        async with AsyncSessionLocal() as db:
+            user = await user_crud.get_user_by_email(db, args.email)
+        if user is None:
+            await async_engine.dispose()
+            raise SystemExit(f"No user with email {args.email}")
+        user_id = user.id
+
+    chunks = _file_chunks(args.path)
+    if args.path.endswith(".gz"):
+        chunks = gunzip_chunks(chunks)
+
+    def progress(report: dict) -> None:
+        print(
+            f"batch {report['batches']}: {report['conversations']} conversations, "
+            f"{report['messages']} messages, {report['rows_per_sec']:.0f} rows/s",
+            file=sys.stderr,
+        )
+
+    importer = HistoryImporter(
+        user_id,
+        batch_size=args.batch_size,
+        max_bytes=args.max_bytes,
+        on_batch=None if args.quiet else progress,
+    )
+    try:
+        report = await importer.run(chunks)
+    except HistoryImportError as exc:
+        raise SystemExit(f"Import stopped at {exc}; committed so far: {json.dumps(importer.report())}")
+    finally:
+        await async_engine.dispose()
+    print(json.dumps(report))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import NDJSON chat history for one user")
+    parser.add_argument("path", help="NDJSON file, .gz for gzip, or - for stdin")
+    owner = parser.add_mutually_exclusive_group(required=True)
+    owner.add_argument("--user-id", type=int)
+    owner.add_argument("--email")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--max-bytes", type=int, default=IMPORT_MAX_BYTES, help="decompressed input limit")
+    parser.add_argument("--quiet", action="store_true", help="no per-batch progress on stderr")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+import httpx
+from groq import AsyncGroq
+
+# groq | mock
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
+# Upstream HTTP tuning for the async client (seconds / connection counts)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Mock provider shape: latency to first token, steady-state rate, +/- jitter
+# fraction applied to every delay and to the reply length
+MOCK_LLM_TTFT_MS = float(os.getenv("MOCK_LLM_TTFT_MS", "300"))
+MOCK_LLM_TOKENS_PER_SEC = float(os.getenv("MOCK_LLM_TOKENS_PER_SEC", "50"))
+MOCK_LLM_JITTER = float(os.getenv("MOCK_LLM_JITTER", "0.2"))
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+MOCK_LLM_RESPONSE_TOKENS = int(os.getenv("MOCK_LLM_RESPONSE_TOKENS", "120"))
+MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED", "0"))
+
+_MOCK_WORDS = (
+    "the", "model", "reply", "stream", "token", "latency", "server", "client",
+    "request", "message", "context", "answer", "simple", "quick", "result",
+    "data", "value", "system", "user", "time", "first", "next", "then", "and",
+)
+
+
+class LLMProvider(ABC):
+    """Chat model backend: one-shot completions and streamed text deltas."""
+
+    name = "base"
+    model = ""
+
+    @abstractmethod
+    async def complete(self, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, messages: list[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"provider": self.name, "model": self.model}
+
+
+class GroqProvider(LLMProvider):
+    """Groq's OpenAI-compatible API over a pooled, process-wide httpx client."""
+
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str = GROQ_MODEL, base_url: str | None = GROQ_BASE_URL):
+        self.model = model
+        self.client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(
+                    LLM_READ_TIMEOUT,
+                    connect=LLM_CONNECT_TIMEOUT,
+                ),
+            ),
+            max_retries=LLM_MAX_RETRIES,
+        )
+
+    async def complete(self, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+        return completion.choices[0].message.content
+
+    async def stream(self, messages: list[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+
+            text = getattr(chunk.choices[0].delta, "content", None)
+            if text:
+                yield text
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class MockProviderError(Exception):
+    """Simulated upstream failure from the mock provider."""
+
+
+class MockProvider(LLMProvider):
+    """Offline stand-in for a real upstream, for load tests and capacity planning.
+
+    Every request draws from its own RNG seeded with ``seed`` and a hash of the
+    messages, so a given prompt always yields the same text, timings and
+    failures regardless of how many requests run concurrently.
+    """
+
+    name = "mock"
+
+    def __init__(
+        self,
+        ttft_ms: float = MOCK_LLM_TTFT_MS,
+        tokens_per_sec: float = MOCK_LLM_TOKENS_PER_SEC,
+        jitter: float = MOCK_LLM_JITTER,
+        error_rate: float = MOCK_LLM_ERROR_RATE,
+        response_tokens: int = MOCK_LLM_RESPONSE_TOKENS,
+        seed: int = MOCK_LLM_SEED,
+    ):
+        self.model = "mock"
+        self.ttft = ttft_ms / 1000
+        self.token_interval = 1 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.response_tokens = response_tokens
+        self.seed = seed
+        self.requests = 0
+        self.errors = 0
+
+    def _rng(self, messages: list[dict]) -> random.Random:
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        return random.Random(f"{self.seed}:{digest}")
+
+    def _jittered(self, rng: random.Random, value: float) -> float:
+        return max(0.0, value * (1 + rng.uniform(-self.jitter, self.jitter)))
+
+    def _plan(self, messages: list[dict], max_tokens: int) -> tuple[random.Random, list[str], int | None]:
+        """Draw the reply tokens and, for a failing request, the token it fails at."""
+        self.requests += 1
+        rng = self._rng(messages)
+        length = min(max_tokens, max(1, round(self._jittered(rng, self.response_tokens))))
+        tokens = [rng.choice(_MOCK_WORDS) + " " for _ in range(length)]
+        tokens[-1] = tokens[-1].rstrip() + "."
+        fail_at = rng.randrange(length) if rng.random() < self.error_rate else None
+        return rng, tokens, fail_at
+
+    def _fail(self) -> None:
+        self.errors += 1
+        raise MockProviderError("mock provider simulated upstream error")
+
+    async def complete(self, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        rng, tokens, fail_at = self._plan(messages, max_tokens)
+        await asyncio.sleep(self._jittered(rng, self.ttft + self.token_interval * len(tokens)))
+        if fail_at is not None:
+            self._fail()
+        return "".join(tokens)
+
+    async def stream(self, messages: list[dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        rng, tokens, fail_at = self._plan(messages, max_tokens)
+        await asyncio.sleep(self._jittered(rng, self.ttft))
+        for i, token in enumerate(tokens):
+            if i == fail_at:
+                self._fail()
+            if i:
+                await asyncio.sleep(self._jittered(rng, self.token_interval))
+            yield token
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+_provider: LLMProvider | None = None
+
+
+def _create_provider() -> LLMProvider | None:
+    if LLM_PROVIDER == "mock":
+        return MockProvider()
+    if LLM_PROVIDER == "groq":
+        return GroqProvider(GROQ_API_KEY) if GROQ_API_KEY else None
+    raise ValueError(f"Unknown LLM provider: {LLM_PROVIDER!r}")
+
+
+def get_provider() -> LLMProvider | None:
+    """Return the process-wide provider chosen by ``LLM_PROVIDER``, or None if unconfigured."""
+    global _provider
+
+    if _provider is None:
+        _provider = _create_provider()
+
+    return _provider
+
+
+def set_provider(provider: LLMProvider | None) -> None:
+    """Replace the process-wide provider, e.g. to point a benchmark at a local upstream."""
+    global _provider
+
+    _provider = provider
+
+
+async def close_provider() -> None:
+    global _provider
+
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
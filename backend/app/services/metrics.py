@@ -0,0 +1,275 @@
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic per-worker counter. Updates are plain dict arithmetic on the event loop."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Current value, either tracked with inc/dec or read from ``callback`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        callback: Callable[[], dict[tuple, float]] | None = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def samples(self) -> Iterable[str]:
+        if self.callback is not None:
+            self.values = self.callback()
+        return super().samples()
+
+
+class Histogram:
+    """Fixed-bucket histogram; each label set owns one preallocated count list."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            plain = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{plain} {series[-1]!r}"
+            yield f"{self.name}_count{plain} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response body completes, by route template.",
+    ("method", "route", "status"),
+))
+sse_streams_in_flight = registry.register(Gauge(
+    "sse_streams_in_flight",
+    "Server-sent event responses currently streaming, by route template.",
+    ("route",),
+))
+ws_connections = registry.register(Gauge(
+    "ws_connections",
+    "Authenticated chat WebSockets currently open.",
+))
+ws_streams_in_flight = registry.register(Gauge(
+    "ws_streams_in_flight",
+    "Conversation streams currently being delivered over chat WebSockets.",
+))
+llm_time_to_first_token = registry.register(Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streamed completion request to its first token.",
+    ("provider",),
+))
+llm_request_duration = registry.register(Histogram(
+    "llm_request_duration_seconds",
+    "Duration of a completion request to the model provider.",
+    ("provider", "mode"),
+))
+llm_tokens_per_second = registry.register(Histogram(
+    "llm_tokens_per_second",
+    "Streamed completion rate after the first token.",
+    ("provider",),
+    RATE_BUCKETS,
+))
+llm_upstream_errors = registry.register(Counter(
+    "llm_upstream_errors_total",
+    "Failed completion requests to the model provider.",
+    ("provider", "mode"),
+))
+llm_prompt_chars = registry.register(Histogram(
+    "llm_prompt_chars",
+    "Characters sent to the model per request, across all prompt messages.",
+    ("provider",),
+    SIZE_BUCKETS,
+))
+llm_completion_chars = registry.register(Histogram(
+    "llm_completion_chars",
+    "Characters received from the model per request.",
+    ("provider",),
+    SIZE_BUCKETS,
+))
+
+
+def _pool_stats() -> dict[tuple, float]:
+    from app.db.session import async_engine
+
+    pool = async_engine.pool
+    stats = {}
+    for stat in ("size", "checkedin", "checkedout", "overflow"):
+        reader = getattr(pool, stat, None)
+        if reader is not None:
+            stats[(stat,)] = reader()
+    return stats
+
+
+db_pool = registry.register(Gauge(
+    "db_pool_connections",
+    "SQLAlchemy async engine pool state (size, checkedin, checkedout, overflow).",
+    ("state",),
+    callback=_pool_stats,
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a pooled connection, including connect time for new ones.",
+))
+db_pool_timeouts = registry.register(Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after the pool timeout.",
+))
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waits."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_timeouts.inc()
+            raise
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency histogram and in-flight SSE gauge.
+
+    Labels use the matched route template, so path parameters never create
+    new series; unmatched paths share one ``unmatched`` label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        streaming_route = None
+
+        async def send_wrapper(message):
+            nonlocal status, streaming_route
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        streaming_route = _route_label(scope)
+                        sse_streams_in_flight.inc(streaming_route)
+                        break
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if streaming_route is not None:
+                sse_streams_in_flight.dec(streaming_route)
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                _route_label(scope),
+                status,
+            )
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
@@ -0,0 +1,94 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+
+from app.models.user import User
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Detached snapshot of the authenticated user; safe to share across requests."""
+
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+class PrincipalCache:
+    """TTL + size bounded caches for decoded token claims and user snapshots.
+
+    Claims are keyed on a SHA-256 digest of the token so raw bearer tokens are
+    never held in memory longer than the request. Entries are per process, so
+    the TTL bounds how long another worker can serve a stale snapshot.
+    """
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, ttl: float = AUTH_CACHE_TTL):
+        self.enabled = maxsize > 0 and ttl > 0
+        self._claims: TTLCache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._users: TTLCache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+
+    @staticmethod
+    def _token_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get_user_id(self, token: str) -> int | None:
+        if not self.enabled:
+            return None
+
+        key = self._token_key(token)
+        entry = self._claims.get(key)
+        if entry is None:
+            return None
+
+        user_id, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            self._claims.pop(key, None)
+            return None
+        return user_id
+
+    def put_user_id(self, token: str, user_id: int, expires_at: float | None) -> None:
+        if self.enabled:
+            self._claims[self._token_key(token)] = (user_id, expires_at)
+
+    def get_principal(self, user_id: int) -> Principal | None:
+        if not self.enabled:
+            return None
+        return self._users.get(user_id)
+
+    def put_principal(self, principal: Principal) -> None:
+        if self.enabled:
+            self._users[principal.id] = principal
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._users.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_user_update(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in ("is_active", "is_superuser", "email")):
+        principal_cache.invalidate_user(target.id)
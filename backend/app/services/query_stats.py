@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar, copy_context
+
+from sqlalchemy import event
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Dev only: flag a request that runs the same statement this many times
+SQL_DEV_MODE = os.getenv("SQL_DEV_MODE", "false").lower() == "true"
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+
+
+class QueryStats:
+    """SQL statements run and time spent in the database for one request."""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self, track_statements: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter | None = Counter() if track_statements else None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        if self.statements is not None:
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int = SQL_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        if self.statements is None:
+            return []
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+# Tasks inherit the context they are created in; background work that
+# outlives a request is started with create_background_task so its queries
+# are not counted against whichever request happened to start it.
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def create_background_task(coro) -> asyncio.Task:
+    """asyncio.create_task without the current request's QueryStats."""
+    context = copy_context()
+    context.run(current_query_stats.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+def _redact(parameters) -> str:
+    """Describe bound parameters by type only, so values never reach the logs."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} parameter sets>"
+        return "(" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + ")"
+    return f"<{type(parameters).__name__}>"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        print(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} params={_redact(parameters)}")
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    start_times = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Attach query accounting to a sync Engine (or an AsyncEngine's ``sync_engine``)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware that scopes query accounting to each request.
+
+    The count and DB time so far are added as ``X-DB-Queries`` and
+    ``Server-Timing`` response headers. For streamed responses that means
+    the queries before the first byte. In SQL_DEV_MODE, statements repeated
+    within one request are reported when it finishes, as a likely N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(track_statements=SQL_DEV_MODE)
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-db-queries", str(stats.count).encode()),
+                    (b"server-timing", f"db;dur={stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            for statement, times in stats.repeated():
+                print(
+                    f"Possible N+1: {scope['method']} {scope['path']} ran {times}x: "
+                    f"{' '.join(statement.split())}"
+                )
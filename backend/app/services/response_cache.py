@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+
+from cachetools import TTLCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import response_cache as cache_crud
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_DB_MAX_ROWS = int(os.getenv("RESPONSE_CACHE_DB_MAX_ROWS", "100000"))
+RESPONSE_CACHE_PRUNE_EVERY = int(os.getenv("RESPONSE_CACHE_PRUNE_EVERY", "500"))
+
+
+class ResponseCache:
+    """Exact-match cache of model replies: in-memory LRU in front of a DB table.
+
+    Keys hash the fully built message list plus the sampling parameters, so
+    two requests share an entry only if the model would see identical input.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        db_max_rows: int = RESPONSE_CACHE_DB_MAX_ROWS,
+        prune_every: int = RESPONSE_CACHE_PRUNE_EVERY,
+    ):
+        self.ttl = ttl
+        self.db_max_rows = db_max_rows
+        self.prune_every = prune_every
+        self._memory: TTLCache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._writes = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], temperature: float, max_tokens: int) -> str:
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, db: AsyncSession, key: str) -> str | None:
+        cached = self._memory.get(key)
+        if cached is not None:
+            self.memory_hits += 1
+            return cached
+
+        cached = await cache_crud.get_cached_response(db, key)
+        if cached is not None:
+            self.db_hits += 1
+            self._memory[key] = cached
+            return cached
+
+        self.misses += 1
+        return None
+
+    async def put(self, db: AsyncSession, key: str, model: str, response: str) -> None:
+        self._memory[key] = response
+        await cache_crud.store_cached_response(db, key, model, response, self.ttl)
+        self.stores += 1
+
+        self._writes += 1
+        if self.prune_every and self._writes % self.prune_every == 0:
+            await cache_crud.prune_cached_responses(db, self.db_max_rows)
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "memory_entries": len(self._memory),
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import uuid
+from typing import AsyncIterator, Awaitable, Callable, Hashable
+
+from app.services.query_stats import create_background_task
+
+SINGLE_FLIGHT_LINGER = float(os.getenv("SINGLE_FLIGHT_LINGER", "2"))
+
+
+class Flight:
+    """One in-progress generation fanned out to any number of subscribers.
+
+    Chunks are kept for the life of the flight so late subscribers replay
+    everything from the start before following the live output.
+    """
+
+    def __init__(self, conversation_id: int | None = None):
+        self.id = uuid.uuid4().hex
+        # Owner of the output; resuming by id is only allowed within it
+        self.conversation_id = conversation_id
+        self.chunks: list[str] = []
+        self.done = False
+        # Set when the producer raised; subscribers end with an error, not done
+        self.error: Exception | None = None
+        self._cond = asyncio.Condition()
+
+    async def publish(self, chunk: str) -> None:
+        async with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    async def finish(self, error: Exception | None = None) -> None:
+        async with self._cond:
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        position = 0
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: position < len(self.chunks) or self.done)
+                pending = self.chunks[position:]
+                finished = self.done
+
+            for chunk in pending:
+                yield chunk
+            position += len(pending)
+
+            if finished and position >= len(self.chunks):
+                return
+
+
+class SingleFlight:
+    """Coalesces identical concurrent work onto a single producer task.
+
+    The producer runs detached from any one request, so a subscriber
+    disconnecting never cancels output the others are waiting on. Finished
+    flights linger briefly so a client retry arriving just after completion
+    replays the result instead of starting over. Per process only.
+    """
+
+    def __init__(self, linger: float = SINGLE_FLIGHT_LINGER):
+        self.linger = linger
+        self._flights: dict[Hashable, Flight] = {}
+        self._by_id: dict[str, Flight] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.started = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def request_key(conversation_id: int, request_id: str | None) -> tuple[int, str]:
+        # Without a client request id every submission is its own flight: the
+        # same text sent twice ("yes", "go on") is two turns, not a retry
+        return conversation_id, request_id or uuid.uuid4().hex
+
+    def join_or_start(
+        self,
+        key: Hashable,
+        producer: Callable[[Flight], Awaitable[None]],
+        conversation_id: int | None = None,
+    ) -> tuple[Flight, bool]:
+        """Return the flight for ``key`` and whether this call started it."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            return flight, False
+
+        flight = Flight(conversation_id)
+        self._flights[key] = flight
+        self._by_id[flight.id] = flight
+        self.started += 1
+
+        task = create_background_task(self._run(key, flight, producer))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return flight, True
+
+    async def _run(self, key: Hashable, flight: Flight, producer) -> None:
+        error = None
+        try:
+            await producer(flight)
+        except Exception as exc:
+            error = exc
+            print("Single-flight producer error:", exc)
+        finally:
+            await flight.finish(error)
+            if self.linger > 0:
+                await asyncio.sleep(self.linger)
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            self._by_id.pop(flight.id, None)
+
+    def get(self, flight_id: str) -> Flight | None:
+        return self._by_id.get(flight_id)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": sum(1 for f in self._flights.values() if not f.done),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+
+stream_flights = SingleFlight()
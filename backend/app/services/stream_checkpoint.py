@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import stream_checkpoint as checkpoint_crud
+from app.db.session import AsyncSessionLocal
+from app.services.single_flight import SingleFlight
+
+STREAM_CHECKPOINT_BYTES = int(os.getenv("STREAM_CHECKPOINT_BYTES", "2048"))
+STREAM_CHECKPOINT_INTERVAL_MS = float(os.getenv("STREAM_CHECKPOINT_INTERVAL_MS", "1000"))
+# A checkpoint not updated for this long belongs to a generation that died
+STREAM_STALE_SECONDS = float(os.getenv("STREAM_STALE_SECONDS", "30"))
+STREAM_CHECKPOINT_RETENTION_HOURS = float(os.getenv("STREAM_CHECKPOINT_RETENTION_HOURS", "24"))
+STREAM_CHECKPOINT_PURGE_EVERY = int(os.getenv("STREAM_CHECKPOINT_PURGE_EVERY", "500"))
+
+_completions = 0
+
+
+def event_id(stream_id: str, offset: int) -> str:
+    """SSE id: the stream plus how many characters of the reply precede this point."""
+    return f"{stream_id}:{offset}"
+
+
+def final_event(stream_id: str, offset: int, failed: bool) -> dict:
+    """The event that ends a stream: ``error`` if the generation raised, else ``done``."""
+    if failed:
+        return {"event": "error", "id": event_id(stream_id, offset), "data": "generation failed"}
+    return {"event": "done", "id": event_id(stream_id, offset), "data": "complete"}
+
+
+def parse_event_id(value: str | None) -> tuple[str, int] | None:
+    if not value:
+        return None
+    stream_id, _, offset = value.rpartition(":")
+    if not stream_id or not offset.isdigit():
+        return None
+    return stream_id, int(offset)
+
+
+class StreamCheckpointer:
+    """Persists partial assistant text every N bytes or T milliseconds."""
+
+    def __init__(self, db: AsyncSession, stream_id: str, conversation_id: int):
+        self.db = db
+        self.stream_id = stream_id
+        self.conversation_id = conversation_id
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+        self._created = False
+
+    async def add(self, text: str) -> None:
+        self._pending.append(text)
+        self._pending_bytes += len(text.encode("utf-8"))
+
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        if self._pending_bytes >= STREAM_CHECKPOINT_BYTES or elapsed_ms >= STREAM_CHECKPOINT_INTERVAL_MS:
+            await self.flush()
+
+    async def flush(self, completed: bool = False, failed: bool = False) -> None:
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+
+        if not self._created:
+            await checkpoint_crud.create_stream_checkpoint(
+                self.db, self.stream_id, self.conversation_id, text, completed, failed
+            )
+            self._created = True
+        else:
+            await checkpoint_crud.append_stream_checkpoint(self.db, self.stream_id, text, completed, failed)
+
+    async def complete(self) -> None:
+        global _completions
+
+        await self.flush(completed=True)
+
+        _completions += 1
+        if STREAM_CHECKPOINT_PURGE_EVERY and _completions % STREAM_CHECKPOINT_PURGE_EVERY == 0:
+            cutoff = datetime.now(timezone.utc) - timedelta(hours=STREAM_CHECKPOINT_RETENTION_HOURS)
+            await checkpoint_crud.purge_stream_checkpoints(self.db, cutoff)
+
+    async def fail(self) -> None:
+        """Mark the stream failed so resuming clients stop polling it."""
+        try:
+            # The session may be mid-transaction from whatever raised
+            await self.db.rollback()
+            await self.flush(failed=True)
+        except Exception as exc:
+            # Pollers fall back to STREAM_STALE_SECONDS
+            print("Stream checkpoint error:", exc)
+
+
+async def resume_events(
+    flights: SingleFlight,
+    conversation_id: int,
+    stream_id: str,
+    offset: int,
+) -> AsyncIterator[dict]:
+    """Replay a stream from ``offset`` and follow it until it completes.
+
+    A generation still running in this worker is followed chunk by chunk.
+    Otherwise the stored checkpoint is replayed and then polled at the
+    checkpoint cadence, which also covers generations owned by other workers.
+    Each poll checks a connection out only for its own query, so a client
+    following a long generation does not hold one between polls.
+    """
+    flight = flights.get(stream_id)
+    # A flight from another conversation falls through to the checkpoint
+    # lookup, which is scoped to conversation_id and reports it unknown
+    if flight is not None and flight.conversation_id == conversation_id:
+        position = 0
+        async for chunk in flight.subscribe():
+            start, position = position, position + len(chunk)
+            if position <= offset:
+                continue
+            yield {"event": "message", "id": event_id(stream_id, position), "data": chunk[max(offset - start, 0):]}
+        yield final_event(stream_id, max(position, offset), flight.error is not None)
+        return
+
+    position = offset
+    while True:
+        async with AsyncSessionLocal() as db:
+            row = await checkpoint_crud.get_stream_checkpoint(db, stream_id, conversation_id, position)
+        if row is None:
+            yield {"event": "error", "data": "unknown stream"}
+            return
+
+        text, completed, failed, updated_at = row
+        if text:
+            position += len(text)
+            yield {"event": "message", "id": event_id(stream_id, position), "data": text}
+
+        if completed or failed:
+            yield final_event(stream_id, position, failed)
+            return
+
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - updated_at > timedelta(seconds=STREAM_STALE_SECONDS):
+                yield {"event": "interrupted", "id": event_id(stream_id, position), "data": "generation stopped"}
+                return
+
+        await asyncio.sleep(STREAM_CHECKPOINT_INTERVAL_MS / 1000)
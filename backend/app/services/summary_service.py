@@ -0,0 +1,142 @@
+import asyncio
+import importlib
+import os
+from typing import Awaitable, Callable
+
+from app.crud import conversation as convo_crud
+from app.crud import message as msg_crud
+from app.db.session import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.services.llm_provider import get_provider
+from app.services.history_cache import HistoryEntry
+from app.services.query_stats import create_background_task
+
+# Turns fold once they no longer fit the prompt's token budget; this many go
+# at a time so a long conversation is not summarized on every turn
+SUMMARY_TRIGGER_MESSAGES = int(os.getenv("SUMMARY_TRIGGER_MESSAGES", "20"))
+SUMMARY_MAX_BATCH = int(os.getenv("SUMMARY_MAX_BATCH", "40"))
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "300"))
+# Optional "module:function" override for the summarizer
+SUMMARIZER = os.getenv("SUMMARIZER")
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a chat between a user and an assistant. "
+    "Merge the new turns into the existing summary. Keep facts, names, decisions "
+    "and open questions; drop pleasantries. Reply with the updated summary only."
+)
+
+Summarizer = Callable[[str | None, list[HistoryEntry]], Awaitable[str | None]]
+
+
+async def llm_summarizer(previous: str | None, turns: list[HistoryEntry]) -> str | None:
+    """Fold ``turns`` into ``previous`` with the configured chat model."""
+    provider = get_provider()
+    if not provider:
+        return None
+
+    transcript = "\n".join(f"{turn.role}: {turn.content}" for turn in turns)
+    return await provider.complete(
+        [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+            {
+                "role": "user",
+                "content": f"Existing summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}",
+            },
+        ],
+        temperature=0.2,
+        max_tokens=SUMMARY_MAX_TOKENS,
+    )
+
+
+def _load_summarizer() -> Summarizer:
+    if not SUMMARIZER:
+        return llm_summarizer
+    module_name, _, attr = SUMMARIZER.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class SummaryScheduler:
+    """Compacts conversations in background tasks, one task per conversation.
+
+    Each run only reads the turns after ``Conversation.summary_message_id``,
+    so work is proportional to what changed since the last summary. Turns
+    are folded before they drop out of the token-budgeted prompt history. Requests
+    only ever call ``schedule``, which never awaits.
+    """
+
+    def __init__(self, summarizer: Summarizer | None = None):
+        self.summarizer = summarizer or _load_summarizer()
+        self._running: dict[int, asyncio.Task] = {}
+        self._rerun: set[int] = set()
+        self.runs = 0
+        self.failures = 0
+
+    def schedule(self, conversation_id: int) -> None:
+        if SUMMARY_TRIGGER_MESSAGES <= 0:
+            return
+        if conversation_id in self._running:
+            self._rerun.add(conversation_id)
+            return
+
+        task = create_background_task(self._run(conversation_id))
+        self._running[conversation_id] = task
+
+    async def _run(self, conversation_id: int) -> None:
+        try:
+            while True:
+                self._rerun.discard(conversation_id)
+                try:
+                    while await self.compact(conversation_id):
+                        pass
+                except Exception as exc:
+                    self.failures += 1
+                    print("Summary compaction error:", exc)
+                if conversation_id not in self._rerun:
+                    break
+        finally:
+            self._running.pop(conversation_id, None)
+
+    async def compact(self, conversation_id: int) -> bool:
+        """Fold one batch of older turns into the summary; True if more may remain."""
+        async with AsyncSessionLocal() as db:
+            convo = await db.get(Conversation, conversation_id)
+            if convo is None:
+                return False
+
+            # The live window is what the prompt will carry verbatim; every
+            # turn before it has to be in the summary or the model never sees it
+            window = await msg_crud.get_history(db, conversation_id, convo.summary_message_id)
+            limit = SUMMARY_MAX_BATCH + len(window)
+            pending = await msg_crud.get_messages_since(db, conversation_id, convo.summary_message_id, limit)
+            gap = len(pending) - len(window)
+            if gap <= 0:
+                return False
+
+            # Fold ahead of the window in batches, but keep half of it verbatim
+            batch = min(max(gap, SUMMARY_TRIGGER_MESSAGES), SUMMARY_MAX_BATCH, gap + len(window) // 2)
+            foldable = pending[:batch]
+
+            turns = [HistoryEntry(m.role, m.content, m.token_count) for m in foldable]
+            summary = await self.summarizer(convo.summary, turns)
+            if not summary:
+                return False
+
+            await convo_crud.update_summary(db, conversation_id, summary.strip(), foldable[-1].id)
+            self.runs += 1
+            return len(pending) == limit
+
+    async def shutdown(self) -> None:
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._running),
+            "runs": self.runs,
+            "failures": self.failures,
+        }
+
+
+summary_scheduler = SummaryScheduler()
@@ -0,0 +1,79 @@
+import asyncio
+import os
+
+from app.core.security import REFRESH_TOKEN_EXPIRE_DAYS
+from app.crud import refresh_token as refresh_crud
+from app.db.session import AsyncSessionLocal
+
+REFRESH_TOKEN_PURGE_INTERVAL = float(os.getenv("REFRESH_TOKEN_PURGE_INTERVAL", "3600"))
+REFRESH_TOKEN_PURGE_BATCH = int(os.getenv("REFRESH_TOKEN_PURGE_BATCH", "1000"))
+# Pause between batches so a large backlog never holds locks for long
+REFRESH_TOKEN_PURGE_PAUSE = float(os.getenv("REFRESH_TOKEN_PURGE_PAUSE", "0.1"))
+
+
+class RefreshTokenPurger:
+    """Periodically deletes revoked and expired refresh tokens in bounded batches.
+
+    Each batch is its own short transaction. A pass stops at the first short
+    batch, so the steady-state cost is one small DELETE per interval.
+    """
+
+    def __init__(
+        self,
+        interval: float = REFRESH_TOKEN_PURGE_INTERVAL,
+        batch_size: int = REFRESH_TOKEN_PURGE_BATCH,
+        pause: float = REFRESH_TOKEN_PURGE_PAUSE,
+        max_age_days: int = REFRESH_TOKEN_EXPIRE_DAYS,
+        session_factory=AsyncSessionLocal,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_age_days = max_age_days
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+        self.passes = 0
+        self.purged = 0
+
+    def start(self) -> None:
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.purge()
+            except Exception as exc:
+                print("Refresh token purge error:", exc)
+            await asyncio.sleep(self.interval)
+
+    async def purge(self) -> int:
+        """Run one pass; returns the number of tokens deleted."""
+        removed = 0
+        while True:
+            async with self._session_factory() as db:
+                deleted = await refresh_crud.purge_refresh_tokens(db, self.max_age_days, self.batch_size)
+            removed += deleted
+            if deleted < self.batch_size:
+                break
+            await asyncio.sleep(self.pause)
+
+        self.passes += 1
+        self.purged += removed
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "passes": self.passes,
+            "purged": self.purged,
+        }
+
+
+refresh_token_purger = RefreshTokenPurger()
@@ -0,0 +1,41 @@
+import math
+import os
+import re
+
+# "heuristic" needs nothing beyond the stdlib; "tiktoken" is used only if the
+# package and its encoding files are available locally.
+TOKENIZER = os.getenv("TOKENIZER", "heuristic")
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+
+MESSAGE_TOKEN_OVERHEAD = 4  # role and separator tokens the chat format adds per message
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def _load_encoder():
+    if TOKENIZER != "tiktoken":
+        return None
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as exc:
+        print("tiktoken unavailable, using heuristic token counts:", exc)
+        return None
+
+
+_encoder = _load_encoder()
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    # Approximates BPE: one token per punctuation mark, ~4 characters per word piece
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE.findall(text))
+
+
+def message_cost(content: str, token_count: int | None = None) -> int:
+    """Prompt tokens one chat message takes, using its stored count when known."""
+    return (count_tokens(content) if token_count is None else token_count) + MESSAGE_TOKEN_OVERHEAD
@@ -1,20 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.schemas.user import UserCreate
 from app.crud import user
-from app.core.security import hash_password
 
-def create_user(db: Session, payload: UserCreate):
-    existing = user.get_user_by_email(db, payload.email)
+async def create_user(db: AsyncSession, payload: UserCreate):
+    existing = await user.get_user_by_email(db, payload.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    user_data = {
-        "email": payload.email,
-        "hashed_password": hash_password(payload.password),
-    }
-
-    return user.create_user(db, user_data)
+    return await user.create_user(db, payload.email, payload.password)
@@ -0,0 +1,61 @@
+"""Per-request cost of ``get_current_user`` with a cold and a warm principal cache.
+
+Cold: JWT decode plus a primary-key lookup for every call (the old behaviour).
+Warm: token digest and user snapshot served from the in-process cache.
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.auth_overhead
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.core.security import create_access_token
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.deps import get_current_user
+from app.models.user import User
+from app.services.principal_cache import principal_cache
+
+
+def _seed() -> int:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+async def _measure(token: str, iterations: int, warm: bool) -> float:
+    principal_cache.clear()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not warm:
+            principal_cache.clear()
+        # Each request gets its own session, as with the get_async_db dependency
+        async with AsyncSessionLocal() as db:
+            await get_current_user(token, db)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def _main(args) -> None:
+    token = create_access_token({"sub": str(_seed())})
+
+    print(f"{'cache':>6} {'us/request':>12}")
+    for warm in (False, True):
+        per_request = await _measure(token, args.iterations, warm)
+        print(f"{'warm' if warm else 'cold':>6} {per_request:>12.1f}")
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
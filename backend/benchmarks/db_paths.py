@@ -0,0 +1,116 @@
+"""Sync vs async data-layer throughput.
+
+Replays the read path of a chat turn (conversation lookup plus history load)
+through the sync psycopg2 session in a thread pool, the way Starlette runs
+``def`` routes, and through the async CRUD functions on the event loop.
+Uses the database configured for the app (``DATABASE_URL`` / ``POSTGRES_*``).
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.db_paths
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.crud import conversation as convo_crud
+from app.crud import message as msg_crud
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.user import User
+
+# Starlette's default thread limiter size for sync endpoints
+THREADPOOL_SIZE = 40
+
+
+def _seed(history: int) -> tuple[int, int, str]:
+    Base.metadata.create_all(engine)
+    session_id = uuid.uuid4().hex
+    with SessionLocal() as db:
+        user = User(email=f"bench-{session_id}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        convo = Conversation(user_id=user.id, session_id=session_id, title="bench")
+        db.add(convo)
+        db.flush()
+        db.add_all(
+            Message(conversation_id=convo.id, role="user" if i % 2 == 0 else "assistant", content=f"message {i}")
+            for i in range(history)
+        )
+        db.commit()
+        return user.id, convo.id, session_id
+
+
+def _sync_request(user_id: int, convo_id: int, session_id: str) -> None:
+    with SessionLocal() as db:
+        db.scalar(
+            select(Conversation).where(
+                Conversation.id == convo_id,
+                Conversation.user_id == user_id,
+                Conversation.session_id == session_id,
+            )
+        )
+        db.scalars(
+            select(Message).filter_by(conversation_id=convo_id).order_by(Message.created_at)
+        ).all()
+
+
+async def _async_request(user_id: int, convo_id: int, session_id: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await convo_crud.get_conversation(db, convo_id, user_id, session_id)
+        await msg_crud.get_messages(db, convo_id)
+
+
+async def _run_sync(requests: int, concurrency: int, ids: tuple[int, int, str]) -> float:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+        async def one():
+            async with semaphore:
+                await loop.run_in_executor(pool, _sync_request, *ids)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - start
+
+
+async def _run_async(requests: int, concurrency: int, ids: tuple[int, int, str]) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await _async_request(*ids)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def _main(args) -> None:
+    ids = _seed(args.history)
+
+    print(f"{'path':>6} {'concurrency':>12} {'requests':>9} {'req/s':>10}")
+    for concurrency in args.concurrency:
+        for name, runner in (("sync", _run_sync), ("async", _run_async)):
+            elapsed = await runner(args.requests, concurrency, ids)
+            print(f"{name:>6} {concurrency:>12} {args.requests:>9} {args.requests / elapsed:>10.1f}")
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--history", type=int, default=20)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""OpenAI-compatible fake chat completions server used by the benchmarks.
+
+Streams a fixed number of tokens with a fixed delay between them so that
+results only depend on how the client side schedules concurrent streams.
+Tokens cycle through a fixed vocabulary, so replies are deterministic.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+TOKENS_PER_REPLY = 40
+TOKEN_DELAY = 0.01
+VOCABULARY = ("token ",)
+
+
+def _chunk(model: str, content: str | None, finish_reason: str | None = None) -> str:
+    payload = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "delta": {"content": content} if content is not None else {},
+                "finish_reason": finish_reason,
+            }
+        ],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _reply(vocabulary: tuple[str, ...], tokens: int) -> str:
+    return "".join(vocabulary[i % len(vocabulary)] for i in range(tokens))
+
+
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    tokens = request.app.state.tokens
+    delay = request.app.state.delay
+    vocabulary = request.app.state.vocabulary
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay * tokens)
+        return JSONResponse({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": _reply(vocabulary, tokens)},
+                "finish_reason": "stop",
+            }],
+        })
+
+    async def events():
+        for i in range(tokens):
+            await asyncio.sleep(delay)
+            yield _chunk(model, vocabulary[i % len(vocabulary)])
+        yield _chunk(model, None, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def build_app(
+    tokens: int = TOKENS_PER_REPLY,
+    delay: float = TOKEN_DELAY,
+    vocabulary: tuple[str, ...] = VOCABULARY,
+) -> Starlette:
+    app = Starlette(routes=[
+        Route("/openai/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+    ])
+    app.state.tokens = tokens
+    app.state.delay = delay
+    app.state.vocabulary = vocabulary
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_in_thread(app) -> tuple[str, uvicorn.Server]:
+    """Run an ASGI app on a background thread and return its base URL."""
+    port = _free_port()
+    config = uvicorn.Config(
+        app,
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    return f"http://127.0.0.1:{port}", server
+
+
+def start_in_thread(
+    tokens: int = TOKENS_PER_REPLY,
+    delay: float = TOKEN_DELAY,
+    vocabulary: tuple[str, ...] = VOCABULARY,
+) -> tuple[str, uvicorn.Server]:
+    """Run the fake upstream on a background thread and return its base URL."""
+    return serve_in_thread(build_app(tokens, delay, vocabulary))
@@ -0,0 +1,144 @@
+"""Memory and throughput of the streaming NDJSON history export.
+
+Seeds one user with ``--messages`` messages spread over ``--conversations``
+conversations, then drains ``export_ndjson`` (plain and gzip) while sampling
+resident memory after every chunk. Peak RSS growth should stay flat as
+``--messages`` grows. Loading the same history with ``get_messages`` per
+conversation and serializing it in one go is timed last for contrast, since
+it grows the process for good.
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.history_export --messages 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, text
+
+from app.crud import message as msg_crud
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.user import User
+from app.services.history_export import export_ndjson, gzip_chunks
+
+BATCH_SIZE = 10_000
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / 1_048_576
+    except OSError:
+        # Peak rather than current outside Linux; still an upper bound
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _seed(messages: int, conversations: int) -> int:
+    Base.metadata.create_all(engine)
+    session_id = uuid.uuid4().hex
+    content = "lorem ipsum dolor sit amet " * 8
+
+    with SessionLocal() as db:
+        user = User(email=f"bench-{session_id}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        convos = [Conversation(user_id=user.id, session_id=session_id, title=f"bench {i}") for i in range(conversations)]
+        db.add_all(convos)
+        db.commit()
+        ids = [c.id for c in convos]
+
+        if engine.dialect.name == "postgresql":
+            db.execute(
+                text(
+                    "INSERT INTO messages (conversation_id, role, content, created_at) "
+                    "SELECT (:ids)[1 + g % cardinality(:ids)], "
+                    "CASE WHEN g % 2 = 0 THEN 'user' ELSE 'assistant' END, "
+                    ":content || g, now() + g * interval '1 millisecond' "
+                    "FROM generate_series(1, :n) AS g"
+                ),
+                {"ids": ids, "content": content, "n": messages},
+            )
+            db.execute(text("ANALYZE messages"))
+        else:
+            epoch = datetime.now(timezone.utc)
+            for start in range(0, messages, BATCH_SIZE):
+                db.execute(insert(Message), [
+                    {
+                        "conversation_id": ids[i % len(ids)],
+                        "role": "user" if i % 2 == 0 else "assistant",
+                        "content": f"{content}{i}",
+                        "created_at": epoch + timedelta(milliseconds=i),
+                    }
+                    for i in range(start, min(start + BATCH_SIZE, messages))
+                ])
+        db.commit()
+        return user.id
+
+
+async def _drain(label: str, chunks) -> None:
+    baseline = peak = _rss_mb()
+    size = count = 0
+    start = time.perf_counter()
+    async for chunk in chunks:
+        size += len(chunk)
+        count += 1
+        peak = max(peak, _rss_mb())
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<12} {elapsed:>8.2f} {size / 1_048_576:>10.1f} {count:>8} "
+        f"{size / 1_048_576 / elapsed:>8.1f} {peak - baseline:>10.1f}"
+    )
+
+
+async def _naive(user_id: int):
+    # What an export built from the existing list/read calls would do
+    async with AsyncSessionLocal() as db:
+        convos = (await db.scalars(select(Conversation).where(Conversation.user_id == user_id))).all()
+        records = []
+        for convo in convos:
+            records.append({"type": "conversation", "id": convo.id, "title": convo.title})
+            for message in await msg_crud.get_messages(db, convo.id):
+                records.append({
+                    "type": "message",
+                    "id": message.id,
+                    "conversation_id": convo.id,
+                    "role": message.role,
+                    "content": message.content,
+                    "created_at": message.created_at.isoformat(),
+                })
+        yield "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+async def _main(args) -> None:
+    print(f"seeding {args.messages} messages over {args.conversations} conversations ...")
+    user_id = _seed(args.messages, args.conversations)
+
+    print(f"{'export':<12} {'seconds':>8} {'MiB out':>10} {'chunks':>8} {'MiB/s':>8} {'peak +RSS':>10}")
+    await _drain("ndjson", export_ndjson(user_id, batch_size=args.batch_size))
+    await _drain("ndjson.gz", gzip_chunks(export_ndjson(user_id, batch_size=args.batch_size)))
+    if not args.skip_naive:
+        await _drain("load-all", _naive(user_id))
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--skip-naive", action="store_true", help="skip the load-everything baseline")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Concurrent LLM streaming benchmark.
+
+Runs N concurrent ``stream_assistant_reply`` consumers against a local fake
+upstream and reports aggregate throughput. With a non-blocking client the
+throughput grows with N; a blocking client would keep it flat.
+
+    cd backend && python -m benchmarks.llm_stream --concurrency 1 2 4 8 16 32
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks import fake_upstream
+
+
+async def _consume(stream_assistant_reply) -> int:
+    received = 0
+    async for chunk in stream_assistant_reply("hello", []):
+        received += len(chunk.split())
+    return received
+
+
+async def _run(levels: list[int]) -> None:
+    from app.services import chat_service, llm_provider
+
+    print(f"{'streams':>8} {'wall (s)':>10} {'tokens':>8} {'tokens/s':>10}")
+    for n in levels:
+        start = time.perf_counter()
+        counts = await asyncio.gather(
+            *(_consume(chat_service.stream_assistant_reply) for _ in range(n))
+        )
+        elapsed = time.perf_counter() - start
+        total = sum(counts)
+        print(f"{n:>8} {elapsed:>10.3f} {total:>8} {total / elapsed:>10.1f}")
+
+    await llm_provider.close_provider()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--tokens", type=int, default=fake_upstream.TOKENS_PER_REPLY)
+    parser.add_argument("--delay", type=float, default=fake_upstream.TOKEN_DELAY)
+    args = parser.parse_args()
+
+    base_url, server = fake_upstream.start_in_thread(args.tokens, args.delay)
+
+    # chat_service reads its configuration at import time
+    os.environ["GROQ_API_KEY"] = "benchmark"
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("LLM_MAX_CONNECTIONS", str(max(args.concurrency)))
+    os.environ.setdefault("LLM_MAX_KEEPALIVE_CONNECTIONS", str(max(args.concurrency)))
+
+    try:
+        asyncio.run(_run(args.concurrency))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Latency of a non-auth endpoint during a login storm.
+
+Starts the app under uvicorn in a subprocess, measures ``GET /health``
+latency on its own, then again while ``--logins`` concurrent clients hammer
+``POST /auth/login``. With bcrypt in the dedicated process pool the
+``/health`` percentiles should barely move; excess logins get fast 503s.
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.login_storm
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import engine
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+async def _probe(client: httpx.AsyncClient, duration: float) -> list[float]:
+    samples = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+
+async def _storm(client: httpx.AsyncClient, credentials: dict, duration: float, counts: dict) -> None:
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        r = await client.post("/auth/login", json=credentials)
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+
+
+def _report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:>12} p50={statistics.median(samples):7.2f}ms "
+        f"p95={_percentile(samples, 0.95):7.2f}ms p99={_percentile(samples, 0.99):7.2f}ms "
+        f"n={len(samples)}"
+    )
+
+
+async def _main(args, base_url: str) -> None:
+    credentials = {"email": f"bench-{uuid.uuid4().hex}@example.com", "password": "benchmark-password"}
+    limits = httpx.Limits(max_connections=args.logins + 10)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        r = await client.post("/auth/register", json=credentials)
+        r.raise_for_status()
+
+        _report("idle", await _probe(client, args.duration))
+
+        counts: dict[int, int] = {}
+        storm = [
+            asyncio.create_task(_storm(client, credentials, args.duration, counts))
+            for _ in range(args.logins)
+        ]
+        _report("login storm", await _probe(client, args.duration))
+        await asyncio.gather(*storm)
+
+        print(f"login responses: {dict(sorted(counts.items()))}")
+        print(f"hasher: {(await client.get('/health')).json().get('password_hasher')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per phase")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/health")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        asyncio.run(_main(args, base_url))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
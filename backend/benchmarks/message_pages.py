@@ -0,0 +1,146 @@
+"""Per-page latency of keyset message pagination over a large table.
+
+Seeds ``--rows`` messages spread over many conversations (one of which holds
+``--conversation-rows``), then times pages fetched with a ``before`` cursor at
+increasing depths. Keyset pages should cost the same at every depth; an
+OFFSET query is timed alongside for contrast.
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.message_pages --rows 2000000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+
+from app.crud import message as msg_crud
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.user import User
+
+BATCH_SIZE = 10_000
+
+
+def _seed(rows: int, conversation_rows: int, conversations: int) -> int:
+    Base.metadata.create_all(engine)
+    session_id = uuid.uuid4().hex
+
+    with SessionLocal() as db:
+        user = User(email=f"bench-{session_id}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        convos = [Conversation(user_id=user.id, session_id=session_id) for _ in range(conversations)]
+        db.add_all(convos)
+        db.commit()
+        target = convos[0].id
+        others = [c.id for c in convos[1:]] or [target]
+
+        if engine.dialect.name == "postgresql":
+            db.execute(
+                text(
+                    "INSERT INTO messages (conversation_id, role, content, created_at) "
+                    "SELECT :cid, 'user', 'message ' || g, now() + g * interval '1 millisecond' "
+                    "FROM generate_series(1, :n) AS g"
+                ),
+                {"cid": target, "n": conversation_rows},
+            )
+            db.execute(
+                text(
+                    "INSERT INTO messages (conversation_id, role, content, created_at) "
+                    "SELECT (:others)[1 + g % cardinality(:others)], 'user', 'message ' || g, now() "
+                    "FROM generate_series(1, :n) AS g"
+                ),
+                {"others": others, "n": max(rows - conversation_rows, 0)},
+            )
+        else:
+            epoch = datetime.now(timezone.utc)
+
+            def batches(cid_for, n):
+                for start in range(0, n, BATCH_SIZE):
+                    yield [
+                        {
+                            "conversation_id": cid_for(i),
+                            "role": "user",
+                            "content": f"message {i}",
+                            "created_at": epoch + timedelta(milliseconds=i),
+                        }
+                        for i in range(start, min(start + BATCH_SIZE, n))
+                    ]
+
+            for batch in batches(lambda i: target, conversation_rows):
+                db.execute(insert(Message), batch)
+            for batch in batches(lambda i: others[i % len(others)], max(rows - conversation_rows, 0)):
+                db.execute(insert(Message), batch)
+
+        db.commit()
+        if engine.dialect.name == "postgresql":
+            db.execute(text("ANALYZE messages"))
+        return target
+
+
+async def _timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def _main(args) -> None:
+    print(f"seeding {args.rows} rows ...")
+    convo_id = _seed(args.rows, args.conversation_rows, args.conversations)
+
+    async with AsyncSessionLocal() as db:
+        ids = (await db.scalars(
+            select(Message.id)
+            .filter_by(conversation_id=convo_id)
+            .order_by(Message.created_at, Message.id)
+        )).all()
+        total = len(ids)
+
+        print(f"{'depth':>7} {'keyset ms':>10} {'offset ms':>10}")
+        for fraction in (0.0, 0.1, 0.5, 0.9, 0.99):
+            position = total - 1 - int(fraction * (total - 1))
+            cursor = ids[position]
+
+            keyset = await _timed(
+                lambda: msg_crud.get_messages_page(db, convo_id, args.limit, before=cursor),
+                args.repeat,
+            )
+            offset = await _timed(
+                lambda: db.scalars(
+                    select(Message)
+                    .filter_by(conversation_id=convo_id)
+                    .order_by(Message.created_at.desc(), Message.id.desc())
+                    .offset(total - position)
+                    .limit(args.limit)
+                ),
+                args.repeat,
+            )
+            print(f"{fraction:>7.0%} {keyset:>10.2f} {offset:>10.2f}")
+
+        count = await db.scalar(select(func.count()).select_from(Message))
+        print(f"messages table rows: {count}")
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--conversation-rows", type=int, default=200_000)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
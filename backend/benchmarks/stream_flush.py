@@ -0,0 +1,149 @@
+"""Stream flush policy benchmark.
+
+Serves ``stream_assistant_reply`` through ``EventSourceResponse`` on a local
+uvicorn server, backed by the deterministic fake upstream, and measures what
+a client sees for each flush policy: time to first byte, inter-chunk gaps and
+SSE events per second. The ``code`` vocabulary has no word boundaries, which
+is where a boundary-only policy would hold back the whole reply.
+
+    cd backend && python -m benchmarks.stream_flush --vocabulary prose code --streams 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks import fake_upstream
+
+VOCABULARIES = {
+    "prose": ("The", " quick", " brown", " fox", " jumps", " over", " the", " lazy", " dog", ". "),
+    "code": ("base64", "Encoded", "Payload", "AbCd", "EfGh", "IjKl", "/", "MnOp", "QrSt", "+", "UvWx", "Yz09"),
+}
+
+
+def build_sse_app(policies: dict):
+    from sse_starlette.sse import EventSourceResponse
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    from app.services.chat_service import stream_assistant_reply
+
+    async def stream(request):
+        policy = policies[request.query_params["policy"]]
+
+        async def events():
+            async for chunk in stream_assistant_reply("hello", [], flush_policy=policy):
+                yield {"event": "message", "data": chunk}
+            yield {"event": "done", "data": "complete"}
+
+        return EventSourceResponse(events())
+
+    return Starlette(routes=[Route("/stream", stream)])
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _consume(client: httpx.AsyncClient, policy: str) -> tuple[float, list[float], int, int]:
+    """Return TTFB, inter-event gaps, event count and payload bytes for one stream."""
+    start = time.perf_counter()
+    ttfb = None
+    last = None
+    gaps: list[float] = []
+    events = 0
+    payload = 0
+
+    async with client.stream("GET", "/stream", params={"policy": policy}) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+                if event != "message":
+                    continue
+                now = time.perf_counter()
+                if ttfb is None:
+                    ttfb = now - start
+                else:
+                    gaps.append(now - last)
+                last = now
+                events += 1
+            elif line.startswith("data:") and event == "message":
+                payload += len(line[5:].lstrip().encode())
+
+    return ttfb or 0.0, gaps, events, payload
+
+
+async def _run(sse_url: str, policies: list[str], streams: int) -> None:
+    print(
+        f"{'policy':>12} {'ttfb p50 ms':>12} {'gap p50 ms':>11} {'gap p95 ms':>11} "
+        f"{'gap max ms':>11} {'events':>7} {'events/s':>9} {'bytes/evt':>10}"
+    )
+    async with httpx.AsyncClient(base_url=sse_url, timeout=120) as client:
+        for policy in policies:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(_consume(client, policy) for _ in range(streams)))
+            elapsed = time.perf_counter() - start
+
+            ttfbs = [r[0] for r in results]
+            gaps = [gap for r in results for gap in r[1]]
+            events = sum(r[2] for r in results)
+            payload = sum(r[3] for r in results)
+            print(
+                f"{policy:>12} {statistics.median(ttfbs) * 1000:>12.1f} "
+                f"{_percentile(gaps, 0.50) * 1000:>11.1f} {_percentile(gaps, 0.95) * 1000:>11.1f} "
+                f"{max(gaps, default=0) * 1000:>11.1f} {events:>7} {events / elapsed:>9.1f} "
+                f"{payload / max(events, 1):>10.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vocabulary", choices=sorted(VOCABULARIES), nargs="+", default=["prose", "code"])
+    parser.add_argument("--policy", nargs="+", default=["word", "bytes", "latency", "passthrough"])
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.005)
+    parser.add_argument("--max-bytes", type=int, default=64)
+    parser.add_argument("--max-latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    # chat_service reads its configuration at import time
+    os.environ.setdefault("LLM_MAX_CONNECTIONS", str(args.streams))
+    os.environ.setdefault("LLM_MAX_KEEPALIVE_CONNECTIONS", str(args.streams))
+
+    from app.services import flush_policy
+
+    policies = {
+        "word": flush_policy.WordBoundaryPolicy(args.max_bytes),
+        "bytes": flush_policy.MaxBytesPolicy(args.max_bytes),
+        "latency": flush_policy.MaxLatencyPolicy(args.max_latency_ms),
+        "passthrough": flush_policy.PassThroughPolicy(),
+    }
+
+    for vocabulary in args.vocabulary:
+        upstream_url, upstream = fake_upstream.start_in_thread(
+            args.tokens, args.delay, VOCABULARIES[vocabulary]
+        )
+        from app.services import llm_provider
+
+        # Point the shared provider at this run's upstream
+        llm_provider.set_provider(llm_provider.GroqProvider("benchmark", base_url=upstream_url))
+
+        sse_url, sse_server = fake_upstream.serve_in_thread(build_sse_app(policies))
+        print(f"\nvocabulary={vocabulary} streams={args.streams} tokens={args.tokens} delay={args.delay}s")
+        try:
+            asyncio.run(_run(sse_url, args.policy, args.streams))
+        finally:
+            sse_server.should_exit = True
+            upstream.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""End-to-end load and microbenchmark suite with JSON output.
+
+Serves the real FastAPI app on a local uvicorn server, backed by the mock LLM
+provider and either the configured database or a throwaway SQLite stand-in,
+and drives the hot paths concurrently:
+
+* micro: ``get_current_user`` (cold and warm principal cache),
+  ``build_history_context`` and ``_build_messages``
+* http: conversation listing, message posting and SSE streaming, with
+  requests/sec, p50/p95/p99 latency, time to first token and DB queries
+  per request
+
+Results are written as JSON, so runs can be diffed between commits.
+
+    cd backend && python -m benchmarks.suite --output bench.json
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.suite
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+def _percentiles(values: list[float]) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class QueryCounter:
+    """Counts statements sent to the database through the async engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def _seed(conversations: int, history: int) -> tuple[int, str, list[int]]:
+    from app.db import models  # noqa: F401
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.models.conversation import Conversation
+    from app.models.message import Message
+    from app.models.user import User
+    from app.services.tokenizer import count_tokens
+
+    Base.metadata.create_all(engine)
+    session_id = uuid.uuid4().hex
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    with SessionLocal() as db:
+        user = User(email=f"bench-{session_id}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        convos = [
+            Conversation(user_id=user.id, session_id=session_id, title=f"bench {i}")
+            for i in range(conversations)
+        ]
+        db.add_all(convos)
+        db.flush()
+        for convo in convos:
+            for i in range(history):
+                content = f"seeded message {i} for conversation {convo.id}"
+                db.add(Message(
+                    conversation_id=convo.id,
+                    role="user" if i % 2 == 0 else "assistant",
+                    content=content,
+                    token_count=count_tokens(content),
+                    created_at=start + timedelta(seconds=i),
+                ))
+        db.commit()
+        return user.id, session_id, [c.id for c in convos]
+
+
+def _micro(fn, iterations: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "us_per_op": round(elapsed / iterations * 1e6, 3),
+        "ops_per_sec": round(iterations / elapsed, 1),
+    }
+
+
+async def _amicro(fn, iterations: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "iterations": iterations,
+        "us_per_op": round(elapsed / iterations * 1e6, 3),
+        "ops_per_sec": round(iterations / elapsed, 1),
+    }
+
+
+async def _run_micro(token: str, convo_id: int, iterations: int) -> dict:
+    from app.crud import message as msg_crud
+    from app.db.session import AsyncSessionLocal
+    from app.deps import get_current_user
+    from app.services.chat_turns import build_history_context
+    from app.services.chat_service import _build_messages
+    from app.services.principal_cache import principal_cache
+
+    results = {}
+    async with AsyncSessionLocal() as db:
+        async def cold():
+            principal_cache.clear()
+            await get_current_user(token=token, db=db)
+
+        async def warm():
+            await get_current_user(token=token, db=db)
+
+        results["get_current_user_cold"] = await _amicro(cold, iterations)
+        await warm()
+        results["get_current_user_warm"] = await _amicro(warm, iterations)
+
+        rows = await msg_crud.get_messages(db, convo_id)
+
+    context = build_history_context(rows)
+    uncounted = [{"role": m["role"], "content": m["content"]} for m in context]
+    results["build_history_context"] = _micro(lambda: build_history_context(rows), iterations)
+    results["build_messages"] = _micro(lambda: _build_messages("benchmark prompt", context), iterations)
+    results["build_messages_uncounted"] = _micro(
+        lambda: _build_messages("benchmark prompt", uncounted), iterations
+    )
+    return results
+
+
+async def _load(
+    name: str,
+    request,
+    workers: list[int],
+    requests: int,
+    counter: QueryCounter,
+) -> dict:
+    """Run ``requests`` calls of ``request(convo_id, n)`` spread over one worker per conversation."""
+    latencies: list[float] = []
+    ttfts: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker(convo_id: int) -> None:
+        nonlocal errors
+        for n in remaining:
+            start = time.perf_counter()
+            try:
+                ttft = await request(convo_id, n)
+            except Exception as exc:
+                errors += 1
+                print(f"{name} request failed:", exc, file=sys.stderr)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if ttft is not None:
+                ttfts.append(ttft - start)
+
+    queries_before = counter.count
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(convo_id) for convo_id in workers))
+    elapsed = time.perf_counter() - start
+    completed = len(latencies)
+
+    result = {
+        "requests": completed,
+        "errors": errors,
+        "concurrency": len(workers),
+        "wall_s": round(elapsed, 3),
+        "rps": round(completed / elapsed, 1),
+        **_percentiles(latencies),
+        "db_queries_per_request": round((counter.count - queries_before) / max(completed, 1), 2),
+    }
+    if ttfts:
+        result["ttft"] = _percentiles(ttfts)
+    return result
+
+
+async def _run_http(
+    base_url: str,
+    token: str,
+    session_id: str,
+    convo_ids: list[int],
+    concurrency: int,
+    requests: int,
+    counter: QueryCounter,
+) -> dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    workers = convo_ids[:concurrency]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=120) as client:
+        async def list_conversations(convo_id: int, n: int) -> None:
+            response = await client.get("/conversations", params={"session_id": session_id})
+            response.raise_for_status()
+
+        async def post_message(convo_id: int, n: int) -> None:
+            response = await client.post(
+                f"/conversations/{convo_id}/messages",
+                params={"session_id": session_id},
+                json={"content": f"benchmark question {n}"},
+            )
+            response.raise_for_status()
+
+        async def stream_message(convo_id: int, n: int) -> float | None:
+            first_token = None
+            async with client.stream(
+                "POST",
+                f"/conversations/{convo_id}/messages/stream",
+                params={"session_id": session_id},
+                json={"content": f"benchmark stream question {n}"},
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if first_token is None and line == "event: message":
+                        first_token = time.perf_counter()
+            return first_token
+
+        return {
+            "list_conversations": await _load("list_conversations", list_conversations, workers, requests, counter),
+            "post_message": await _load("post_message", post_message, workers, requests, counter),
+            "stream_message": await _load("stream_message", stream_message, workers, requests, counter),
+        }
+
+
+async def _run(args) -> dict:
+    import uvicorn
+
+    from app.core.security import create_access_token
+    from app.db.session import async_engine
+    from app.main import app
+    from app.services.llm_provider import get_provider
+
+    user_id, session_id, convo_ids = _seed(max(args.conversations, args.concurrency), args.history)
+    token = create_access_token({"sub": str(user_id)})
+    counter = QueryCounter(async_engine)
+
+    micro = await _run_micro(token, convo_ids[0], args.iterations)
+
+    # Client and server share this event loop, as in a single-worker deployment
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    try:
+        http = await _run_http(
+            f"http://127.0.0.1:{args.port}",
+            token,
+            session_id,
+            convo_ids,
+            args.concurrency,
+            args.requests,
+            counter,
+        )
+        provider_stats = get_provider().stats()
+    finally:
+        server.should_exit = True
+        await serving
+        await async_engine.dispose()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "database": async_engine.dialect.name,
+            "llm_provider": provider_stats,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "conversations": max(args.conversations, args.concurrency),
+            "history_messages": args.history,
+        },
+        "micro": micro,
+        "http": http,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="requests per HTTP scenario")
+    parser.add_argument("--iterations", type=int, default=2000, help="calls per microbenchmark")
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--history", type=int, default=20, help="seeded messages per conversation")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    # The app reads its configuration at import time. Without a configured
+    # database the suite runs against a throwaway SQLite file.
+    if not os.getenv("DATABASE_URL") and os.getenv("ENV", "local") == "local" and not os.getenv("POSTGRES_HOST"):
+        os.environ["ENV"] = "bench"
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["LLM_PROVIDER"] = "mock"
+    os.environ.setdefault("MOCK_LLM_TTFT_MS", "50")
+    os.environ.setdefault("MOCK_LLM_TOKENS_PER_SEC", "500")
+    os.environ.setdefault("MOCK_LLM_RESPONSE_TOKENS", "40")
+
+    results = asyncio.run(_run(args))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
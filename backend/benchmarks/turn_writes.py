@@ -0,0 +1,92 @@
+"""Commit throughput and write latency for assistant-message persistence.
+
+Simulates ``--chats`` concurrent streams that each persist ``--turns``
+assistant messages, once with a commit per message (``create_message``) and
+once through the group-commit writer. Reports messages committed per second
+and p50/p99 per-write latency.
+
+    cd backend && ENV=prod DATABASE_URL=postgresql://... python -m benchmarks.turn_writes --chats 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from app.crud import message as msg_crud
+from app.db import models  # noqa: F401
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models.conversation import Conversation
+from app.models.user import User
+from app.services.group_commit import GroupCommitWriter
+
+
+def _seed(chats: int) -> list[int]:
+    Base.metadata.create_all(engine)
+    session_id = uuid.uuid4().hex
+    with SessionLocal() as db:
+        user = User(email=f"bench-{session_id}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        convos = [Conversation(user_id=user.id, session_id=session_id) for _ in range(chats)]
+        db.add_all(convos)
+        db.commit()
+        return [c.id for c in convos]
+
+
+async def _chat(convo_id: int, turns: int, write, latencies: list[float]) -> None:
+    for turn in range(turns):
+        start = time.perf_counter()
+        await write(convo_id, f"assistant reply {turn} " * 20)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def _per_message_commit(convo_id: int, content: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await msg_crud.create_message(db, convo_id, "assistant", content)
+
+
+async def _run(label: str, convo_ids: list[int], turns: int, write) -> None:
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_chat(cid, turns, write, latencies) for cid in convo_ids))
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    print(
+        f"{label:>14} {len(latencies) / elapsed:>10.1f} msg/s "
+        f"p50={statistics.median(latencies):8.2f}ms p99={p99:8.2f}ms"
+    )
+
+
+async def _main(args) -> None:
+    convo_ids = _seed(args.chats)
+
+    await _run("commit/message", convo_ids, args.turns, _per_message_commit)
+
+    writer = GroupCommitWriter(enabled=True, window_ms=args.window_ms, max_batch=args.max_batch)
+    await _run(
+        "group commit",
+        convo_ids,
+        args.turns,
+        lambda cid, content: writer.submit(cid, "assistant", content),
+    )
+    print(f"group commit batches={writer.batches} rows={writer.rows}")
+    await writer.stop()
+
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chats", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--window-ms", type=float, default=5)
+    parser.add_argument("--max-batch", type=int, default=256)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()